@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import User
+
+ROLE_VERSION_KEY = 'yamdb:role-version:{}'
+TOKEN_USER_CLAIMS = (
+    'username', 'role', 'is_staff', 'is_superuser', 'role_version'
+)
+
+_role_versions = {}
+
+
+def get_token_for_user(user):
+    token = AccessToken.for_user(user)
+    for claim in TOKEN_USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def set_role_version(user_id, role_version):
+    # Записи в кэше живут недолго: с кэшем в памяти процесса (LocMemCache)
+    # остальные процессы узнают о смене роли только после истечения срока.
+    cache.set(
+        ROLE_VERSION_KEY.format(user_id), role_version,
+        settings.TOKEN_USER_CACHE_TTL
+    )
+    _role_versions.pop(user_id, None)
+
+
+def forget_role_version(user_id):
+    cache.delete(ROLE_VERSION_KEY.format(user_id))
+    _role_versions.pop(user_id, None)
+
+
+def get_role_version(user_id):
+    now = time.monotonic()
+    cached = _role_versions.get(user_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    key = ROLE_VERSION_KEY.format(user_id)
+    role_version = cache.get(key)
+    if role_version is None:
+        role_version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('role_version', flat=True).first()
+        if role_version is not None:
+            cache.add(key, role_version, settings.TOKEN_USER_CACHE_TTL)
+    _role_versions[user_id] = (
+        role_version, now + settings.TOKEN_USER_CACHE_TTL
+    )
+    return role_version
+
+
+def build_token_user(validated_token):
+    claims = {
+        'id': validated_token[api_settings.USER_ID_CLAIM],
+        **{claim: validated_token[claim] for claim in TOKEN_USER_CLAIMS},
+        'is_active': True,
+    }
+    # from_db раскладывает значения по полям в порядке concrete_fields,
+    # а не в порядке переданных имён. Остальные поля отложены
+    # и при обращении догрузятся из базы.
+    field_names = [
+        field.attname for field in User._meta.concrete_fields
+        if field.attname in claims
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, field_names,
+        [claims[name] for name in field_names]
+    )
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in TOKEN_USER_CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if get_role_version(user_id) != validated_token['role_version']:
+            raise InvalidToken('Токен отозван: права пользователя изменились')
+        return build_token_user(validated_token)
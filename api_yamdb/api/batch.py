@@ -0,0 +1,72 @@
+import json
+import logging
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from rest_framework import status
+
+logger = logging.getLogger('api.batch')
+
+NOT_FOUND = {'detail': 'Страница не найдена.'}
+NESTED_BATCH = {'detail': 'Пакетный запрос не может содержать пакетные.'}
+SERVER_ERROR = {'detail': 'Внутренняя ошибка сервера.'}
+
+
+def build_request(request, method, path, body):
+    parts = urlsplit(path)
+    content = b'' if body is None else json.dumps(body).encode()
+    environ = dict(request.META)
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'wsgi.input': BytesIO(content),
+        'wsgi.url_scheme': request.scheme,
+    })
+    sub_request = WSGIRequest(environ)
+    if request.user.is_authenticated:
+        # Пользователь уже аутентифицирован пакетным запросом: DRF примет
+        # его без повторной проверки токена.
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def response_body(response):
+    if hasattr(response, 'data'):
+        return response.data
+    if response.streaming:
+        content = b''.join(response.streaming_content)
+    else:
+        content = response.content
+    if not content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(content)
+    return content.decode(response.charset)
+
+
+def dispatch(request, method, path, body=None, batch_view=None):
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return status.HTTP_404_NOT_FOUND, NOT_FOUND
+    if batch_view is not None and getattr(match.func, 'cls', None) is (
+        batch_view
+    ):
+        return status.HTTP_400_BAD_REQUEST, NESTED_BATCH
+    sub_request = build_request(request, method, path, body)
+    sub_request.resolver_match = match
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Http404:
+        return status.HTTP_404_NOT_FOUND, NOT_FOUND
+    except Exception:
+        logger.exception('Ошибка подзапроса %s %s', method, path)
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, SERVER_ERROR
+    return response.status_code, response_body(response)
@@ -0,0 +1,78 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+GENERATION_KEY = 'yamdb:generation:{}'
+RESPONSE_KEY = 'yamdb:response:{}'
+HITS_KEY = 'yamdb:response-cache:hits'
+MISSES_KEY = 'yamdb:response-cache:misses'
+
+
+def get_cache():
+    return caches[settings.API_RESPONSE_CACHE_ALIAS]
+
+
+def _increment(key):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Счётчик вытеснен или ещё не создан: начинаем с метки времени,
+        # чтобы не совпасть со старыми поколениями и не отдать
+        # устаревший ответ.
+        value = time.time_ns()
+        if cache.add(key, value, timeout=None):
+            return value
+        return cache.incr(key)
+
+
+def bump_generation(*models):
+    for model in models:
+        _increment(GENERATION_KEY.format(model._meta.label_lower))
+
+
+def get_generations(models):
+    cache = get_cache()
+    keys = [GENERATION_KEY.format(model._meta.label_lower) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def response_key(request, models):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    generations = ':'.join(str(gen) for gen in get_generations(models))
+    raw = f'{request.build_absolute_uri(request.path)}?{query}|{generations}'
+    return RESPONSE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def _count(key):
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def record_hit():
+    _count(HITS_KEY)
+
+
+def record_miss():
+    _count(MISSES_KEY)
+
+
+def cache_stats():
+    cache = get_cache()
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        'hits': stats.get(HITS_KEY, 0),
+        'misses': stats.get(MISSES_KEY, 0),
+    }
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+
+from api.cache import get_generations
+
+_snapshots = {}
+
+
+class CatalogSnapshot:
+    def __init__(self, generation, objects):
+        self.generation = generation
+        self.created = time.monotonic()
+        self.by_id = {obj.pk: obj for obj in objects}
+        self.by_slug = {obj.slug: obj for obj in objects}
+        self.rendered = {}
+
+
+def get_snapshot(model):
+    # Поколение читается до выборки строк: изменение, случившееся
+    # между ними, сменит поколение, и снимок перечитается. Поколения
+    # в кэше отдельного процесса (LocMemCache) не видят чужих изменений,
+    # поэтому снимок ещё и перечитывается по истечении срока.
+    generation, = get_generations([model])
+    snapshot = _snapshots.get(model)
+    if (
+        snapshot is None
+        or snapshot.generation != generation
+        or time.monotonic() - snapshot.created
+        >= settings.CATALOG_SNAPSHOT_MAX_AGE
+    ):
+        snapshot = CatalogSnapshot(
+            generation, list(model._default_manager.all())
+        )
+        _snapshots[model] = snapshot
+    return snapshot
+
+
+def get_by_slug(model, slug):
+    return get_snapshot(model).by_slug.get(slug)
+
+
+def get_by_id(model, pk):
+    return get_snapshot(model).by_id.get(pk)
+
+
+def invalidate(*models):
+    for model in models:
+        _snapshots.pop(model, None)
@@ -0,0 +1,175 @@
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields, serializers
+from rest_framework.relations import ManyRelatedField, PKOnlyObject
+
+# Поля, у которых to_representation не меняет значение из базы.
+PLAIN_FIELDS = (
+    fields.CharField, fields.EmailField, fields.SlugField,
+    fields.IntegerField, fields.BooleanField,
+)
+
+_compiled = {}
+
+
+class CompiledSerializer:
+    def __init__(self, values, columns, many, factory):
+        self.values = values
+        self.columns = columns
+        self.many = many
+        self.factory = factory
+
+    def render(self, serializer, rows):
+        converters = [
+            self.converter(serializer, field_name, kind)
+            for field_name, kind in self.columns
+            if kind != 'plain'
+        ]
+        convert = self.factory(*converters)
+        related = {
+            field_name: self.load_many(serializer, field_name, model_field,
+                                       rows)
+            for field_name, model_field in self.many
+        }
+        return [convert(row, related) for row in rows]
+
+    @staticmethod
+    def converter(serializer, field_name, kind):
+        field = serializer.fields[field_name]
+        if kind == 'pk':
+            return lambda value: field.to_representation(PKOnlyObject(value))
+        if kind == 'property':
+            prop = getattr(serializer.Meta.model, field.source)
+            names = serializer.Meta.source_fields[field_name]
+
+            def convert(row):
+                value = prop.fget(
+                    SimpleNamespace(**{name: row[name] for name in names})
+                )
+                return None if value is None else field.to_representation(
+                    value
+                )
+            return convert
+        return field.to_representation
+
+    @staticmethod
+    def load_many(serializer, field_name, model_field, rows):
+        child = serializer.fields[field_name].child_relation
+        through = model_field.remote_field.through
+        source = model_field.m2m_field_name()
+        target = model_field.m2m_reverse_field_name()
+        links = through.objects.filter(**{
+            f'{source}__in': [row['pk'] for row in rows]
+        }).order_by(target).values_list(f'{source}_id', f'{target}_id')
+        related = {}
+        for pk, target_id in links:
+            related.setdefault(pk, []).append(
+                child.to_representation(PKOnlyObject(target_id))
+            )
+        return related
+
+
+def compile_serializer(serializer):
+    # Для сериализатора строится функция, превращающую строку values()
+    # в словарь ответа; поля, которые так не выразить, отключают сборку.
+    key = (type(serializer), tuple(serializer.fields))
+    if key not in _compiled:
+        _compiled[key] = build(serializer)
+    return _compiled[key]
+
+
+def column(model, field_name, field, source_fields):
+    if field_name in source_fields:
+        if not isinstance(getattr(model, field.source, None), property):
+            return None
+        return 'property', None
+    if field.source == '*' or len(field.source_attrs) != 1:
+        return None
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    if model_field.is_relation:
+        return relation_column(field, model_field)
+    if type(field) in PLAIN_FIELDS:
+        return 'plain', model_field.name
+    if isinstance(field, (serializers.BaseSerializer,
+                          serializers.RelatedField)):
+        return None
+    return 'field', model_field.name
+
+
+def relation_column(field, model_field):
+    if model_field.many_to_many:
+        if (
+            isinstance(field, ManyRelatedField)
+            and field.child_relation.use_pk_only_optimization()
+        ):
+            return 'many', model_field
+        return None
+    if not model_field.many_to_one or not isinstance(
+        field, serializers.RelatedField
+    ):
+        return None
+    if field.use_pk_only_optimization():
+        return 'pk', model_field.name
+    if isinstance(field, serializers.SlugRelatedField):
+        return 'plain', f'{model_field.name}__{field.slug_field}'
+    return None
+
+
+def build(serializer):
+    meta = getattr(serializer, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    if model is None:
+        return None
+    source_fields = getattr(meta, 'source_fields', {})
+    values = {'pk'}
+    columns = []
+    many = []
+    items = []
+    converters = []
+    for field_name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        spec = column(model, field_name, field, source_fields)
+        if spec is None:
+            return None
+        kind, path = spec
+        if kind == 'many':
+            many.append((field_name, path))
+            items.append(
+                f"{field_name!r}: related[{field_name!r}].get(row['pk'], [])"
+            )
+            continue
+        columns.append((field_name, kind))
+        if kind == 'plain':
+            values.add(path)
+            items.append(f'{field_name!r}: row[{path!r}]')
+            continue
+        converter = f'c{len(converters)}'
+        converters.append(converter)
+        if kind == 'property':
+            values.update(source_fields[field_name])
+            items.append(f'{field_name!r}: {converter}(row)')
+        else:
+            values.add(path)
+            items.append(
+                f'{field_name!r}: None if row[{path!r}] is None '
+                f'else {converter}(row[{path!r}])'
+            )
+    source = (
+        f'def factory({", ".join(converters)}):\n'
+        '    def convert(row, related):\n'
+        '        return {\n'
+        + ''.join(f'            {item},\n' for item in items)
+        + '        }\n'
+        '    return convert\n'
+    )
+    namespace = {}
+    exec(compile(source, f'<compiled {type(serializer).__name__}>', 'exec'),
+         namespace)
+    return CompiledSerializer(
+        sorted(values), columns, many, namespace['factory']
+    )
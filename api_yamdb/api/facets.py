@@ -0,0 +1,251 @@
+import logging
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from api.cache import get_generations
+from api.catalog import get_by_id, get_by_slug
+from api.filters import TitleFilter
+from reviews.models import Category, Genre, Title
+
+# Фильтры, которые выражаются через битовые карты индекса; с любыми
+# другими (рейтинг меняется с каждым отзывом, имя и поиск не
+# индексируются) фасеты считаются группирующими запросами.
+INDEXED_FILTERS = {
+    'category', 'genre', 'genre_mode', 'year', 'year_min', 'year_max'
+}
+
+logger = logging.getLogger('api.facets')
+
+_index = None
+_lock = threading.Lock()
+_rebuild = None
+
+
+def bit_count(bits):
+    if hasattr(bits, 'bit_count'):
+        return bits.bit_count()
+    return bin(bits).count('1')
+
+
+def to_bitmap(ids, size):
+    buffer = bytearray(size)
+    for pk in ids:
+        buffer[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class FacetIndex:
+    # Битовые карты над id произведений: бит pk установлен, если
+    # произведение входит в категорию, жанр или год.
+    def __init__(self, generation, titles, links):
+        self.generation = generation
+        self.created = time.monotonic()
+        everything = array('q')
+        categories = defaultdict(lambda: array('q'))
+        years = defaultdict(lambda: array('q'))
+        genres = defaultdict(lambda: array('q'))
+        for pk, category_id, year in titles:
+            everything.append(pk)
+            categories[category_id].append(pk)
+            years[year].append(pk)
+        for title_id, genre_id in links:
+            genres[genre_id].append(title_id)
+        size = (max(everything, default=0) >> 3) + 1
+        self.all = to_bitmap(everything, size)
+        self.categories = {
+            pk: to_bitmap(ids, size) for pk, ids in categories.items()
+        }
+        self.years = {year: to_bitmap(ids, size)
+                      for year, ids in years.items()}
+        self.genres = {
+            pk: to_bitmap(ids, size) & self.all
+            for pk, ids in genres.items()
+        }
+
+    def select(self, data):
+        bits = self.all
+        if data.get('category'):
+            category = get_by_slug(Category, data['category'])
+            bits &= self.categories.get(category.pk, 0) if category else 0
+        if data.get('genre'):
+            bits &= self.genre_bits(data['genre'], data.get('genre_mode'))
+        if data.get('year') is not None:
+            bits &= self.years.get(data['year'], 0)
+        if data.get('year_min') is not None or (
+            data.get('year_max') is not None
+        ):
+            bits &= self.year_range(data.get('year_min'),
+                                    data.get('year_max'))
+        return bits
+
+    def genre_bits(self, value, mode):
+        slugs = [slug.strip() for slug in value.split(',') if slug.strip()]
+        genres = [get_by_slug(Genre, slug) for slug in slugs]
+        known = [genre.pk for genre in genres if genre is not None]
+        if not known or (mode == 'and' and len(known) < len(genres)):
+            return 0
+        bits = 0 if mode != 'and' else self.all
+        for pk in known:
+            if mode == 'and':
+                bits &= self.genres.get(pk, 0)
+            else:
+                bits |= self.genres.get(pk, 0)
+        return bits
+
+    def year_range(self, year_min, year_max):
+        bits = 0
+        for year, year_bits in self.years.items():
+            if (year_min is None or year >= year_min) and (
+                year_max is None or year <= year_max
+            ):
+                bits |= year_bits
+        return bits
+
+    def counts(self, bits):
+        decades = Counter()
+        for year, year_bits in self.years.items():
+            count = bit_count(bits & year_bits)
+            if count:
+                decades[year // 10 * 10] += count
+        return {
+            'category': catalog_counts(Category, self.bitmap_counts(
+                bits, self.categories
+            )),
+            'genre': catalog_counts(Genre, self.bitmap_counts(
+                bits, self.genres
+            )),
+            'decade': decade_counts(decades),
+        }
+
+    @staticmethod
+    def bitmap_counts(bits, bitmaps):
+        for pk, facet_bits in bitmaps.items():
+            count = bit_count(bits & facet_bits)
+            if count:
+                yield pk, count
+
+
+def build_index(generation):
+    return FacetIndex(
+        generation,
+        Title.objects.order_by().values_list(
+            'pk', 'category_id', 'year'
+        ).iterator(chunk_size=10000),
+        Title.genre.through.objects.order_by().values_list(
+            'title_id', 'genre_id'
+        ).iterator(chunk_size=10000),
+    )
+
+
+def refresh_index(generation):
+    global _index, _rebuild
+    try:
+        _index = build_index(generation)
+    except Exception:
+        logger.exception('Не удалось перестроить индекс фасетов')
+    finally:
+        connection.close()
+        with _lock:
+            _rebuild = None
+
+
+def start_rebuild(generation):
+    global _rebuild
+    with _lock:
+        if _rebuild is None:
+            _rebuild = threading.Thread(
+                target=refresh_index, args=(generation,), daemon=True
+            )
+            _rebuild.start()
+
+
+def wait_for_index(timeout=None):
+    rebuild = _rebuild
+    if rebuild is not None:
+        rebuild.join(timeout)
+    return _index
+
+
+def get_index(generation=None):
+    # Индекс перестраивается при смене поколения произведений: его
+    # меняют правки произведений и их жанров, но не отзывы. Поколения
+    # из кэша процесса не видят чужих правок, поэтому индекс ещё и
+    # перестраивается по истечении срока. Перестройка идёт в фоновом
+    # потоке, а запросы до её окончания получают прежний индекс или,
+    # пока индекса нет, None.
+    if generation is None:
+        generation, = get_generations([Title])
+    index = _index
+    if (
+        index is None
+        or index.generation != generation
+        or time.monotonic() - index.created
+        >= settings.FACET_INDEX_MAX_AGE
+    ):
+        start_rebuild(generation)
+    return index
+
+
+def grouped(queryset, field):
+    return queryset.order_by().values_list(field).annotate(count=Count('*'))
+
+
+def catalog_counts(model, rows):
+    # Названия берём из кэша справочника, а не соединением в запросе.
+    items = []
+    for pk, count in rows:
+        obj = get_by_id(model, pk)
+        if obj is not None:
+            items.append({'name': obj.name, 'slug': obj.slug,
+                          'count': count})
+    return sorted(items, key=lambda item: (-item['count'], item['slug']))
+
+
+def decade_counts(decades):
+    return [
+        {'decade': decade, 'count': count}
+        for decade, count in sorted(decades.items())
+    ]
+
+
+def query_facets(titles):
+    # Три группирующих запроса: категория и год у произведения, жанр
+    # в связующей таблице; годы сворачиваются в десятилетия в Python.
+    titles = titles.order_by()
+    links = Title.genre.through.objects.all()
+    if titles.query.has_filters():
+        links = links.filter(title_id__in=titles.values('pk'))
+    decades = Counter()
+    for year, count in grouped(titles, 'year'):
+        decades[year // 10 * 10] += count
+    return {
+        'category': catalog_counts(
+            Category, grouped(titles, 'category_id')
+        ),
+        'genre': catalog_counts(Genre, grouped(links, 'genre_id')),
+        'decade': decade_counts(decades),
+    }
+
+
+def facet_counts(titles, params):
+    # Вместе с количествами возвращается признак их актуальности:
+    # прежний индекс, отданный на время перестройки, может отставать.
+    active = {name for name in TitleFilter.base_filters if params.get(name)}
+    if not active <= INDEXED_FILTERS:
+        return query_facets(titles), True
+    generation, = get_generations([Title])
+    index = get_index(generation)
+    if index is None:
+        return query_facets(titles), True
+    form = TitleFilter(params, queryset=titles).form
+    form.is_valid()
+    return (
+        index.counts(index.select(form.cleaned_data)),
+        index.generation == generation,
+    )
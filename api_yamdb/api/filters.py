@@ -1,14 +1,79 @@
+from django.db.models import ExpressionWrapper, F, FloatField
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
-from reviews.models import Title
+from api.catalog import get_by_slug
+from reviews.models import Category, Genre, Title
+from reviews.search import search_titles
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(field_name="category__slug")
-    genre = filters.CharFilter(field_name="genre__slug")
+    category = filters.CharFilter(method="filter_category")
+    genre = filters.CharFilter(method="filter_genre")
+    genre_mode = filters.ChoiceFilter(
+        choices=(("or", "or"), ("and", "and")), method="skip"
+    )
     name = filters.CharFilter(field_name="name")
     year = filters.NumberFilter(field_name="year")
+    year_min = filters.NumberFilter(field_name="year", lookup_expr="gte")
+    year_max = filters.NumberFilter(field_name="year", lookup_expr="lte")
+    rating_min = filters.NumberFilter(method="filter_rating")
+    rating_max = filters.NumberFilter(method="filter_rating")
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Title
-        fields = ["category", "genre", "name", "year"]
+        fields = [
+            "category", "genre", "genre_mode", "name", "year", "year_min",
+            "year_max", "rating_min", "rating_max", "search",
+        ]
+
+    def skip(self, queryset, name, value):
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+    def filter_category(self, queryset, name, value):
+        category = get_by_slug(Category, value)
+        if category is None:
+            return queryset.none()
+        return queryset.filter(category_id=category.pk)
+
+    def filter_genre(self, queryset, name, value):
+        # Несколько жанров через запятую: по умолчанию подходит любой
+        # из них, genre_mode=and требует все. Подзапросы вместо соединения
+        # не размножают строки произведений.
+        slugs = [slug.strip() for slug in value.split(",") if slug.strip()]
+        genres = [get_by_slug(Genre, slug) for slug in slugs]
+        known = [genre.pk for genre in genres if genre is not None]
+        require_all = self.form.cleaned_data.get("genre_mode") == "and"
+        if not known or (require_all and len(known) < len(genres)):
+            return queryset.none()
+        links = Title.genre.through.objects.values("title_id")
+        if not require_all:
+            return queryset.filter(pk__in=links.filter(genre_id__in=known))
+        for genre_id in known:
+            queryset = queryset.filter(pk__in=links.filter(genre_id=genre_id))
+        return queryset
+
+    def filter_rating(self, queryset, name, value):
+        # Сравниваем сумму оценок с порогом, умноженным на количество
+        # отзывов, чтобы не делить в каждой строке.
+        lookup = "gte" if name == "rating_min" else "lte"
+        return queryset.filter(**{
+            "review_count__gt": 0,
+            f"score_sum__{lookup}": ExpressionWrapper(
+                F("review_count") * float(value), output_field=FloatField()
+            ),
+        })
+
+
+class StableOrderingFilter(OrderingFilter):
+    # Одинаковые значения (и NULL у произведений без отзывов) не должны
+    # перемешиваться между страницами.
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering:
+            ordering = [*ordering, 'pk']
+        return ordering
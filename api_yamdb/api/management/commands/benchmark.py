@@ -0,0 +1,298 @@
+import json
+import math
+import platform
+import random
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from io import StringIO
+
+import django
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from api.authentication import get_token_for_user
+from reviews.models import Comment, Title, User
+
+SERVER_TIMING = re.compile(r'desc="(\d+) queries"')
+DATASET_OPTIONS = ('users', 'categories', 'genres', 'titles', 'reviews',
+                   'comments', 'seed')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон эндпоинтов API на воспроизводимом наборе данных '
+        'во временной тестовой базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=5000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Количество замеряемых запросов на сценарий'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Количество прогревочных запросов на сценарий'
+        )
+        parser.add_argument(
+            '--clear-cache', action='store_true',
+            help='Очищать кэш перед каждым запросом'
+        )
+        parser.add_argument(
+            '--scenario', action='append',
+            help='Запустить только указанные сценарии'
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для результатов в формате JSON'
+        )
+        parser.add_argument(
+            '--compare', nargs=2, metavar=('BASE', 'NEW'),
+            help='Сравнить два файла результатов вместо прогона'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.1,
+            help='Допустимый относительный рост p95 и числа запросов к БД'
+        )
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(*options['compare'], options['threshold'])
+        if options['requests'] + options['warmup'] > options['titles']:
+            raise CommandError(
+                'Для сценария создания отзывов нужно не меньше произведений, '
+                'чем запросов (--requests + --warmup)'
+            )
+        self.options = options
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                QUERY_BUDGET_RAISE=False,
+            ):
+                started = time.monotonic()
+                call_command(
+                    'generate_dataset', stdout=StringIO(),
+                    **{name: options[name] for name in DATASET_OPTIONS}
+                )
+                self.stdout.write(
+                    f'Набор данных создан за '
+                    f'{time.monotonic() - started:.1f} с'
+                )
+                results = self.run_scenarios()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        report = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'requests': options['requests'],
+                'clear_cache': options['clear_cache'],
+                'dataset': {name: options[name] for name in DATASET_OPTIONS},
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(
+            self.style.SUCCESS(f'Результаты записаны в {options["output"]}')
+        )
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(user)}'
+            )
+        return client
+
+    def scenarios(self):
+        rng = random.Random(self.options['seed'])
+        titles = self.options['titles']
+        anonymous = self.client_for()
+        reader = User.objects.filter(role=User.USER).first()
+        reader_client = self.client_for(reader)
+        admin = User.objects.create(
+            username='bench-admin', email='bench-admin@yamdb.fake',
+            role=User.ADMIN
+        )
+        admin_client = self.client_for(admin)
+        writer = User.objects.create(
+            username='bench-writer', email='bench-writer@yamdb.fake'
+        )
+        writer_client = self.client_for(writer)
+        commented = list(
+            Comment.objects.values_list('review__title_id', 'review_id')
+            .distinct()[:100]
+        )
+        category = Title.objects.values_list(
+            'category__slug', flat=True
+        ).first()
+        popular = range(1, min(titles, 10) + 1)
+        pages = max(1, titles // settings.REST_FRAMEWORK['PAGE_SIZE'])
+        title_ids = iter(range(1, titles + 1))
+        signups = iter(range(1, 10 ** 9))
+
+        def review_create():
+            return ('post', f'/api/v1/titles/{next(title_ids)}/reviews/',
+                    {'text': 'Замер', 'score': rng.randint(1, 10)},
+                    writer_client)
+
+        def comment_create():
+            title_id, review_id = rng.choice(commented)
+            return ('post', f'/api/v1/titles/{title_id}/reviews/'
+                    f'{review_id}/comments/', {'text': 'Замер'},
+                    writer_client)
+
+        def comments_list():
+            title_id, review_id = rng.choice(commented)
+            return ('get', f'/api/v1/titles/{title_id}/reviews/'
+                    f'{review_id}/comments/', None, anonymous)
+
+        def signup():
+            number = next(signups)
+            return ('post', '/api/v1/auth/signup/',
+                    {'username': f'bench{number}',
+                     'email': f'bench{number}@yamdb.fake'}, anonymous)
+
+        def token():
+            return ('post', '/api/v1/auth/token/', {
+                'username': reader.username,
+                'confirmation_code':
+                    default_token_generator.make_token(reader),
+            }, anonymous)
+
+        return {
+            'titles_list': lambda: (
+                'get', '/api/v1/titles/', None, anonymous),
+            'titles_list_page': lambda: (
+                'get', f'/api/v1/titles/?page={rng.randint(1, pages)}', None,
+                anonymous),
+            'titles_list_filtered': lambda: (
+                'get', f'/api/v1/titles/?category={category}'
+                f'&year={rng.randint(1900, 2023)}', None, anonymous),
+            'titles_search': lambda: (
+                'get', '/api/v1/titles/?search=город', None, anonymous),
+            'title_detail': lambda: (
+                'get', f'/api/v1/titles/{rng.randint(1, titles)}/', None,
+                anonymous),
+            'reviews_list': lambda: (
+                'get', f'/api/v1/titles/{rng.choice(popular)}/reviews/',
+                None, anonymous),
+            'reviews_list_deep': lambda: (
+                'get', f'/api/v1/titles/{rng.choice(popular)}/reviews/'
+                f'?offset={rng.randint(0, 1000)}', None, anonymous),
+            'comments_list': comments_list,
+            'categories_list': lambda: (
+                'get', '/api/v1/categories/', None, anonymous),
+            'genres_list': lambda: (
+                'get', '/api/v1/genres/', None, anonymous),
+            'users_list': lambda: (
+                'get', '/api/v1/users/', None, admin_client),
+            'users_me': lambda: (
+                'get', '/api/v1/users/me/', None, reader_client),
+            'signup': signup,
+            'token': token,
+            'review_create': review_create,
+            'comment_create': comment_create,
+        }
+
+    def run_scenarios(self):
+        selected = self.options['scenario']
+        results = {}
+        for name, build in self.scenarios().items():
+            if selected and name not in selected:
+                continue
+            for _ in range(self.options['warmup']):
+                self.request(build())
+            latencies = []
+            queries = []
+            statuses = Counter()
+            started = time.perf_counter()
+            for _ in range(self.options['requests']):
+                latency, response = self.request(build())
+                latencies.append(latency)
+                statuses[response.status_code] += 1
+                timing = SERVER_TIMING.search(
+                    response.get('Server-Timing', '')
+                )
+                if timing:
+                    queries.append(int(timing.group(1)))
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                'count': len(latencies),
+                'p50_ms': round(percentile(latencies, 0.50), 3),
+                'p95_ms': round(percentile(latencies, 0.95), 3),
+                'p99_ms': round(percentile(latencies, 0.99), 3),
+                'mean_ms': round(sum(latencies) / len(latencies), 3),
+                'queries_per_request': (
+                    round(sum(queries) / len(queries), 2) if queries else None
+                ),
+                'throughput_rps': round(len(latencies) / elapsed, 1),
+                'status_codes': {
+                    str(code): count for code, count in statuses.items()
+                },
+            }
+            self.stdout.write(
+                f'{name}: p50={results[name]["p50_ms"]} мс '
+                f'p95={results[name]["p95_ms"]} мс '
+                f'запросов к БД={results[name]["queries_per_request"]}'
+            )
+        return results
+
+    def request(self, scenario):
+        method, url, data, client = scenario
+        if self.options['clear_cache']:
+            cache.clear()
+        started = time.perf_counter()
+        response = getattr(client, method)(url, data=data)
+        return (time.perf_counter() - started) * 1000, response
+
+    def compare(self, base_path, new_path, threshold):
+        with open(base_path, encoding='utf-8') as base_file:
+            base = json.load(base_file)['results']
+        with open(new_path, encoding='utf-8') as new_file:
+            new = json.load(new_file)['results']
+        regressions = []
+        for name in sorted(base.keys() & new.keys()):
+            for metric in ('p95_ms', 'queries_per_request'):
+                old_value, new_value = base[name][metric], new[name][metric]
+                if not old_value or new_value is None:
+                    continue
+                change = (new_value - old_value) / old_value
+                line = (
+                    f'{name} {metric}: {old_value} -> {new_value} '
+                    f'({change:+.1%})'
+                )
+                if change > threshold:
+                    regressions.append(line)
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(line)
+        if regressions:
+            raise CommandError(f'Обнаружено регрессий: {len(regressions)}')
+        self.stdout.write(self.style.SUCCESS('Регрессий не обнаружено'))
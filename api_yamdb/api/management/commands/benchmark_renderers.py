@@ -0,0 +1,91 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+
+WORDS = ('тайна', 'дорога', 'город', 'ночь', 'звезда', 'море', 'война')
+
+
+class AsciiJSONRenderer(JSONRenderer):
+    ensure_ascii = True
+
+
+class Command(BaseCommand):
+    help = 'Сравнение скорости JSON-рендереров на страницах ответов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items', type=int, default=100,
+            help='Количество элементов на странице'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=500,
+            help='Количество повторов для каждого рендерера'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        pages = {
+            'titles': self.page(
+                [self.title(rng, pk) for pk in range(1, options['items'] + 1)]
+            ),
+            'reviews': self.page(
+                [self.review(rng, pk) for pk in range(1, options['items'] + 1)]
+            ),
+        }
+        fast = FastJSONRenderer()
+        renderers = {
+            'json (ascii)': AsciiJSONRenderer().render,
+            'json': JSONRenderer().render,
+            'fast': fast.render,
+            'fast (поток)': lambda data: b''.join(fast.iter_render(data, 100)),
+        }
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson не установлен: fast использует стандартный json'
+            ))
+        for page_name, data in pages.items():
+            baseline = None
+            for name, render in renderers.items():
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    content = render(data)
+                elapsed = (time.perf_counter() - started) / options['repeat']
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f'{page_name:8} {name:14} {elapsed * 1e6:9.1f} мкс '
+                    f'{len(content):8} байт  x{baseline / elapsed:.2f}'
+                )
+
+    @staticmethod
+    def page(results):
+        return {'count': len(results) * 10, 'next': None, 'previous': None,
+                'results': results}
+
+    @staticmethod
+    def title(rng, pk):
+        return {
+            'id': pk,
+            'name': ' '.join(rng.sample(WORDS, 2)).capitalize(),
+            'year': rng.randint(1900, 2023),
+            'rating': rng.randint(1, 10),
+            'description': ' '.join(rng.choices(WORDS, k=20)),
+            'genre': [{'name': f'Жанр {index}', 'slug': f'genre-{index}'}
+                      for index in rng.sample(range(30), 3)],
+            'category': {'name': 'Фильм', 'slug': 'movie'},
+        }
+
+    @staticmethod
+    def review(rng, pk):
+        return {
+            'id': pk,
+            'author': f'user{rng.randint(1, 1000)}',
+            'text': ' '.join(rng.choices(WORDS, k=30)),
+            'score': rng.randint(1, 10),
+            'pub_date': '2023-01-01T12:00:00.000000Z',
+            'title': 1,
+        }
@@ -0,0 +1,77 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('api.queries')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.monotonic() - started
+            self.count += 1
+
+
+def get_query_budget(view_func, method):
+    view_class = getattr(view_func, 'cls', None)
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(view_func, 'actions', None) or {}
+        budget = budget.get(actions.get(method.lower(), method.lower()))
+    return budget
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        request.query_budget = None
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        duration = stats.duration * 1000
+        response['Server-Timing'] = (
+            f'db;dur={duration:.2f};desc="{stats.count} queries"'
+        )
+        logger.info(
+            '%s %s %s queries=%d db_ms=%.2f',
+            request.method, request.path, response.status_code,
+            stats.count, duration,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': stats.count,
+                'db_ms': round(duration, 2),
+                'query_budget': request.query_budget,
+            }
+        )
+        if (
+            request.query_budget is not None
+            and stats.count > request.query_budget
+        ):
+            message = (
+                f'{request.method} {request.path}: {stats.count} SQL-запросов '
+                f'при бюджете {request.query_budget}'
+            )
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
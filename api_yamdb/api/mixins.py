@@ -1,10 +1,380 @@
-from rest_framework import filters, mixins, viewsets
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import filters, mixins, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
 
+from api.cache import get_cache, record_hit, record_miss, response_key
+from api.compiled import compile_serializer
+from api.facets import facet_counts
 from api.permissions import IsAdminOrReadOnly
+from api.renderers import FastJSONRenderer
+from reviews.models import Review, Title
+
+
+class CachedResponseMixin:
+    cache_models = ()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = response_key(request, self.cache_models)
+        data = cache.get(key)
+        if data is not None:
+            record_hit()
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        record_miss()
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK and getattr(
+            response, 'cacheable', True
+        ):
+            cache.set(key, response.data,
+                      settings.API_RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class FacetCountsMixin:
+    # С ?facets=true к ответу списка произведений добавляются количества
+    # по категориям, жанрам и десятилетиям для текущего набора фильтров.
+    facets_query_param = 'facets'
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if (
+            request.query_params.get(self.facets_query_param)
+            in ('1', 'true', 'True')
+            and response.status_code == status.HTTP_200_OK
+            and isinstance(response.data, dict)
+        ):
+            # Фасеты из прежнего индекса не кэшируются под новым
+            # поколением произведений.
+            response.data['facets'], response.cacheable = self.get_facets(
+                self.filter_queryset(self.get_queryset())
+            )
+        return response
+
+    def get_facets(self, queryset):
+        return facet_counts(queryset, self.request.query_params)
+
+
+class CompiledListMixin:
+    # Список собирается из строк values() функцией, построенной по
+    # сериализатору; compiled_list = False возвращает обычный путь DRF.
+    compiled_list = True
+
+    def get_compiled(self, serializer):
+        return self.compiled_list and compile_serializer(serializer)
+
+    def compiled_rows(self, queryset, compiled):
+        return queryset.prefetch_related(None).values(*dict.fromkeys((
+            *compiled.values, *self.pagination_fields()
+        )))
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        compiled = self.get_compiled(serializer)
+        if not compiled:
+            return super().list(request, *args, **kwargs)
+        queryset = self.compiled_rows(
+            self.filter_queryset(self.get_queryset()), compiled
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                compiled.render(serializer, page)
+            )
+        return Response(compiled.render(serializer, list(queryset)))
+
+
+class BatchRetrieveMixin(CompiledListMixin):
+    # Несколько объектов по списку id: порядок запроса сохраняется,
+    # ненайденные id перечисляются в missing.
+    ids_query_param = 'ids'
+    max_batch_size = 500
+    read_only_actions = ('batch',)
+
+    def list(self, request, *args, **kwargs):
+        if self.ids_query_param in request.query_params:
+            return self.batch_response(
+                request.query_params[self.ids_query_param].split(',')
+            )
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post'], permission_classes=(AllowAny,))
+    def batch(self, request):
+        if hasattr(request.data, 'getlist'):
+            ids = request.data.getlist(self.ids_query_param)
+        else:
+            ids = request.data.get(self.ids_query_param)
+        return self.batch_response(ids)
+
+    def batch_response(self, ids):
+        results, missing = self.render_ids(
+            list(dict.fromkeys(self.validate_ids(ids)))
+        )
+        return Response({'results': results, 'missing': missing})
+
+    def render_ids(self, ids):
+        # Фильтры, поиск и сортировка списка к выборке по id не относятся:
+        # из filter_queryset нужна только оптимизация запроса.
+        queryset = self.optimize_queryset(self.get_queryset()).filter(
+            pk__in=ids
+        )
+        serializer = self.get_serializer()
+        compiled = self.get_compiled(serializer)
+        if compiled:
+            rows = list(self.compiled_rows(queryset, compiled))
+            keys = [row['pk'] for row in rows]
+            data = compiled.render(serializer, rows)
+        else:
+            objects = list(queryset)
+            keys = [obj.pk for obj in objects]
+            data = self.get_serializer(objects, many=True).data
+        found = dict(zip(keys, data))
+        return (
+            [found[pk] for pk in ids if pk in found],
+            [pk for pk in ids if pk not in found],
+        )
+
+    def validate_ids(self, ids):
+        field = serializers.ListField(
+            child=serializers.IntegerField(min_value=1),
+            allow_empty=False,
+            max_length=self.max_batch_size,
+        )
+        try:
+            return field.run_validation(ids)
+        except ValidationError as error:
+            raise ValidationError({self.ids_query_param: error.detail})
+
+
+class StreamingResponseMixin:
+    # Большие списки отдаются потоком, чтобы не собирать тело ответа
+    # целиком в памяти.
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if not self.should_stream(response):
+            return response
+        renderer = response.accepted_renderer
+        streaming = StreamingHttpResponse(
+            renderer.iter_render(
+                response.data, settings.JSON_STREAM_CHUNK_SIZE
+            ),
+            status=response.status_code,
+            content_type=renderer.media_type,
+        )
+        for header, value in response.items():
+            if header.lower() != 'content-type':
+                streaming[header] = value
+        return streaming
+
+    def should_stream(self, response):
+        if not isinstance(response, Response) or response.status_code != 200:
+            return False
+        renderer = getattr(response, 'accepted_renderer', None)
+        if not isinstance(renderer, FastJSONRenderer) or renderer.get_indent(
+            response.accepted_media_type, {}
+        ) is not None:
+            return False
+        data = response.data
+        if isinstance(data, dict):
+            data = data.get('results')
+        return (
+            isinstance(data, list)
+            and len(data) >= settings.JSON_STREAM_MIN_ITEMS
+        )
+
+
+class QueryPlan:
+    def __init__(self):
+        self.select = []
+        self.prefetch = []
+        self.only = []
+        self.prunable = True
+
+    def apply(self, queryset, prune=True):
+        if self.select:
+            queryset = queryset.select_related(*self.select)
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*self.prefetch)
+        if prune and self.prunable and self.only:
+            # Внешние ключи оставляем всегда: их читают связанные
+            # менеджеры и проверки прав, а стоят они дёшево.
+            foreign_keys = [
+                field.name for field in queryset.model._meta.concrete_fields
+                if field.is_relation
+            ]
+            queryset = queryset.only(*self.only, *foreign_keys)
+        return queryset
+
+
+def build_query_plan(serializer, model, prefix='', plan=None):
+    plan = plan or QueryPlan()
+    meta = getattr(serializer, 'Meta', None)
+    source_fields = getattr(meta, 'source_fields', {})
+    for field_name, field in serializer.fields.items():
+        if field.write_only or field.source == '*':
+            continue
+        if field_name in source_fields:
+            plan.only.extend(
+                prefix + name for name in source_fields[field_name]
+            )
+            continue
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            plan.prunable = False
+            continue
+        path = prefix + model_field.name
+        if not model_field.is_relation:
+            plan.only.append(path)
+        elif model_field.many_to_one or model_field.one_to_one:
+            plan.only.append(path)
+            if isinstance(field, serializers.BaseSerializer):
+                plan.select.append(path)
+                build_query_plan(
+                    field, model_field.related_model, f'{path}__', plan
+                )
+            elif (
+                getattr(field, 'slug_field', None)
+                and not field.use_pk_only_optimization()
+            ):
+                plan.select.append(path)
+                plan.only.append(f'{path}__{field.slug_field}')
+        else:
+            plan.prefetch.append(
+                Prefetch(path, queryset=related_queryset(field, model_field))
+            )
+    return plan
+
+
+def related_queryset(field, model_field):
+    related_model = model_field.related_model
+    queryset = related_model._default_manager.all()
+    if isinstance(field, serializers.ListSerializer):
+        child_plan = build_query_plan(field.child, related_model)
+    else:
+        child_plan = QueryPlan()
+        child = field.child_relation
+        slug_field = getattr(child, 'slug_field', None)
+        if child.use_pk_only_optimization():
+            slug_field = None
+        child_plan.only.append(slug_field or 'pk')
+    if model_field.one_to_many:
+        child_plan.only.append(model_field.field.name)
+    return child_plan.apply(queryset)
+
+
+class SparseFieldsMixin:
+    # Поля из Meta.optional_fields сериализатора попадают в ответ,
+    # только если названы в fields или include.
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
+    include_query_param = 'include'
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if getattr(self, 'request', None) is not None and self.is_read_only():
+            target = getattr(serializer, 'child', serializer)
+            self.trim_fields(
+                target.fields,
+                self.request.query_params,
+                getattr(getattr(target, 'Meta', None), 'optional_fields', ())
+            )
+        return serializer
+
+    def is_read_only(self):
+        return self.request.method in ('GET', 'HEAD') or (
+            getattr(self, 'action', None)
+            in getattr(self, 'read_only_actions', ())
+        )
+
+    def trim_fields(self, fields, query_params, optional=()):
+        only = self.split_names(query_params.get(self.fields_query_param))
+        exclude = self.split_names(
+            query_params.get(self.exclude_query_param)
+        )
+        include = self.split_names(
+            query_params.get(self.include_query_param)
+        )
+        unknown = (only | exclude | include) - set(fields)
+        if unknown:
+            raise ValidationError({self.fields_query_param: [
+                f'Неизвестные поля: {", ".join(sorted(unknown))}'
+            ]})
+        for name in list(fields):
+            if (
+                (only and name not in only) or name in exclude
+                or (name in optional and name not in only | include)
+            ):
+                del fields[name]
+
+    @staticmethod
+    def split_names(value):
+        return {name.strip() for name in (value or '').split(',')} - {''}
+
+
+class QuerysetOptimizerMixin(SparseFieldsMixin):
+    def optimize_queryset(self, queryset):
+        serializer = self.get_serializer()
+        plan = build_query_plan(serializer, queryset.model)
+        plan.only.extend(self.pagination_fields())
+        return plan.apply(queryset, prune=self.is_read_only())
+
+    def pagination_fields(self):
+        # Пагинатору курсором нужны поля сортировки каждой строки,
+        # даже если в ответ они не попадают.
+        paginator = self.paginator
+        cursor_class = getattr(paginator, 'cursor_pagination_class', None)
+        ordering = getattr(paginator, 'ordering', None) or getattr(
+            cursor_class, 'ordering', ()
+        )
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return [name.lstrip('-') for name in ordering]
+
+    def filter_queryset(self, queryset):
+        return self.optimize_queryset(super().filter_queryset(queryset))
+
+
+class NestedResourceMixin:
+    # Родительские объекты из URL проверяются одним запросом
+    # и запоминаются на время обработки запроса.
+    def get_review(self):
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.select_related('title'),
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            )
+        return self._review
+
+    def get_title(self):
+        if not hasattr(self, '_title'):
+            if 'review_id' in self.kwargs:
+                self._title = self.get_review().title
+            else:
+                self._title = get_object_or_404(
+                    Title, pk=self.kwargs.get('title_id')
+                )
+        return self._title
 
 
 class ReviewGenreModelMixin(
+    QuerysetOptimizerMixin,
+    CachedResponseMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -17,3 +387,5 @@ class ReviewGenreModelMixin(
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name', 'slug')
     lookup_field = 'slug'
+    # Удаление каскадом затрагивает произведения и их связи с жанрами.
+    query_budget = {'list': 4, 'create': 3, 'destroy': 8}
@@ -0,0 +1,53 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Как и JSONRenderer DRF, экранируем разделители строк, которые
+# недопустимы в строковых литералах JavaScript.
+LINE_SEPARATORS = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def dumps(self, data):
+        # Ошибки валидации списков DRF содержат числовые ключи, которые
+        # стандартный json приводит к строкам.
+        content = orjson.dumps(
+            data, default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS
+        )
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in content:
+                content = content.replace(raw, escaped)
+        return content
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        return self.dumps(data)
+
+    def iter_render(self, data, chunk_size):
+        # Ответ отдаётся частями: элементы списка (или results страницы)
+        # кодируются пачками по chunk_size, а не одной строкой.
+        encode = self.dumps if orjson is not None else self.render
+        if isinstance(data, list):
+            items, head, tail = data, b'[', b']'
+        else:
+            rest = {key: value for key, value in data.items()
+                    if key != 'results'}
+            head = encode(rest)[:-1] + b',' if rest else b'{'
+            items, head, tail = data['results'], head + b'"results":[', b']}'
+        yield head
+        for start in range(0, len(items), chunk_size):
+            # Пачка кодируется как список, от которого отрезаются скобки.
+            chunk = encode(items[start:start + chunk_size])[1:-1]
+            yield chunk if start == 0 else b',' + chunk
+        yield tail
@@ -1,9 +1,14 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed
 from django.utils import timezone
+from django.utils.encoding import smart_str
 from rest_framework import serializers
-from rest_framework.relations import SlugRelatedField
-from rest_framework.validators import UniqueTogetherValidator
+from rest_framework.relations import MANY_RELATION_KWARGS, SlugRelatedField
 
-from reviews.models import Category, Genre, Title, User, Review, Comment
+from api.catalog import get_snapshot
+from reviews.models import (Category, Genre, Title, User, Review, Comment,
+                            username_validator)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -29,49 +34,22 @@ class TokenSerializer(serializers.Serializer):
 
 
 class SignUpSerializer(serializers.Serializer):
-    username = serializers.CharField()
-    email = serializers.EmailField()
-
-    def validate(self, data):
-        username = data.get('username')
-        email = data.get('email')
-        if User.objects.filter(
-            username__iexact=username, email__iexact=email
-        ).exists():
-            return data
-        return data
-
-
-class SignUpValidationSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = User
-        fields = ('username', 'email',)
-        validators = [UniqueTogetherValidator(queryset=User.objects.all(),
-                                              fields=['username', 'email']), ]
+    username = serializers.CharField(
+        max_length=150, validators=[username_validator]
+    )
+    email = serializers.EmailField(max_length=254)
 
     def validate_username(self, username):
         if username.lower() == 'me':
             raise serializers.ValidationError('Имя не может быть me')
-        if User.objects.filter(username__iexact=username).exists():
-            raise serializers.ValidationError(
-                'Пользователь с таким именем уже зарегистрирован'
-            )
         return username
 
-    def validate_email(self, email):
-        if User.objects.filter(email__iexact=email).exists():
-            raise serializers.ValidationError(
-                'Пользователь с таким адресом уже зарегистрирован'
-            )
-        return email
-
 
 class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
-        exclude = ('id', )
+        fields = ('name', 'slug')
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -81,22 +59,121 @@ class GenreSerializer(serializers.ModelSerializer):
         exclude = ('id', )
 
 
+class CatalogFieldMixin:
+    # При выводе категории и жанры берутся из снимка справочника
+    # в памяти процесса, поэтому связанные объекты не загружаются из базы.
+    def use_pk_only_optimization(self):
+        return True
+
+    def get_snapshot(self):
+        snapshots = self.root.__dict__.setdefault('_catalog_snapshots', {})
+        if self.model not in snapshots:
+            snapshots[self.model] = get_snapshot(self.model)
+        return snapshots[self.model]
+
+
+class CatalogManySlugField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.fetch(data)
+
+
+class CatalogSlugField(CatalogFieldMixin, SlugRelatedField):
+    # Снимок справочника может отставать от изменений из других
+    # процессов, поэтому записываемые слаги сверяются с базой.
+    def __init__(self, model, **kwargs):
+        self.model = model
+        kwargs.setdefault('queryset', model.objects.all())
+        super().__init__(slug_field='slug', **kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CatalogManySlugField(**list_kwargs)
+
+    def fetch(self, slugs):
+        for slug in slugs:
+            if not isinstance(slug, str):
+                self.fail('invalid')
+        queryset = self.get_queryset().filter(slug__in=dict.fromkeys(slugs))
+        found = {obj.slug: obj for obj in queryset}
+        for slug in slugs:
+            if slug not in found:
+                self.fail('does_not_exist', slug_name=self.slug_field,
+                          value=smart_str(slug))
+        return [found[slug] for slug in slugs]
+
+    def to_internal_value(self, data):
+        return self.fetch([data])[0]
+
+    def to_representation(self, value):
+        obj = self.get_snapshot().by_id.get(value.pk)
+        if obj is not None:
+            return obj.slug
+        return self.model.objects.filter(pk=value.pk).values_list(
+            'slug', flat=True
+        ).first()
+
+
+class CatalogNestedField(CatalogFieldMixin, serializers.RelatedField):
+    def __init__(self, model, serializer_class, **kwargs):
+        self.model = model
+        self.serializer_class = serializer_class
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        snapshot = self.get_snapshot()
+        key = (self.serializer_class, value.pk)
+        if key not in snapshot.rendered:
+            obj = snapshot.by_id.get(value.pk)
+            snapshot.rendered[key] = (
+                self.serializer_class(obj).data if obj is not None else None
+            )
+        rendered = snapshot.rendered[key]
+        return dict(rendered) if rendered is not None else None
+
+
 class TitleSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(
-        slug_field='slug',
-        many=False,
-        queryset=Category.objects.all()
-    )
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
-        many=True,
-        queryset=Genre.objects.all()
-    )
+    category = CatalogSlugField(Category)
+    genre = CatalogSlugField(Genre, many=True)
 
     class Meta:
-        fields = '__all__'
+        exclude = (
+            'score_sum', 'review_count', 'weighted_rating', 'similar_stale'
+        )
         model = Title
 
+    def create(self, validated_data):
+        genres = list(dict.fromkeys(validated_data.pop('genre', [])))
+        with transaction.atomic():
+            title = Title.objects.create(**validated_data)
+            self.add_genres(title, genres)
+        return title
+
+    @staticmethod
+    def add_genres(title, genres):
+        # Новое произведение ещё не связано с жанрами: вставляем связи
+        # одним запросом без предварительных выборок Model.genre.set().
+        through = Title.genre.through
+        through.objects.bulk_create([
+            through(title=title, genre=genre) for genre in genres
+        ])
+        pk_set = {genre.pk for genre in genres}
+        m2m_changed.send(
+            sender=through, instance=title, action='post_add',
+            reverse=False, model=Genre, pk_set=pk_set, using=title._state.db
+        )
+        related = title.genre.all()
+        related._result_cache = genres
+        related._prefetch_done = True
+        title._prefetched_objects_cache = {'genre': related}
+
     def validate_year(self, value):
         current_year = timezone.now().year
         if value > current_year:
@@ -105,9 +182,14 @@ class TitleSerializer(serializers.ModelSerializer):
 
 
 class TitlesViewSerializer(serializers.ModelSerializer):
-    category = CategorySerializer(many=False, required=True)
-    genre = GenreSerializer(many=True, required=False)
-    rating = serializers.IntegerField()
+    category = CatalogNestedField(
+        Category, CategorySerializer, read_only=True
+    )
+    genre = CatalogNestedField(
+        Genre, GenreSerializer, many=True, read_only=True
+    )
+    rating = serializers.IntegerField(read_only=True)
+    weighted_rating = serializers.FloatField(read_only=True)
 
     class Meta:
         fields = (
@@ -115,16 +197,20 @@ class TitlesViewSerializer(serializers.ModelSerializer):
             'name',
             'year',
             'rating',
+            'weighted_rating',
             'description',
             'genre',
             'category'
         )
         model = Title
+        source_fields = {'rating': ('score_sum', 'review_count')}
+        optional_fields = ('weighted_rating',)
         read_only_fields = (
             'id',
             'name',
             'year',
             'rating',
+            'weighted_rating',
             'description',
             'genre',
             'category'
@@ -142,18 +228,6 @@ class ReviewsSerializer(serializers.ModelSerializer):
         model = Review
         read_only_fields = ['title']
 
-    def validate(self, data):
-        if self.context['request'].method == 'POST':
-            title_id = (
-                self.context['request'].parser_context['kwargs']['title_id']
-            )
-            user = self.context['request'].user
-            if user.reviews.filter(title_id=title_id).exists():
-                raise serializers.ValidationError(
-                    'Нельзя дважды писать отзыв к одному произведению!'
-                )
-        return data
-
     def validate_score(self, value):
         if 0 >= value >= 10:
             raise serializers.ValidationError('Проверьте поставленную оценку!')
@@ -166,3 +240,44 @@ class CommentsSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('id', 'text', 'author', 'pub_date')
         model = Comment
+
+
+class TopTitlesSerializer(serializers.Serializer):
+    category = serializers.CharField(required=False)
+    genre = serializers.CharField(required=False)
+    year_min = serializers.IntegerField(required=False)
+    year_max = serializers.IntegerField(required=False)
+    min_reviews = serializers.IntegerField(required=False, min_value=1)
+    limit = serializers.IntegerField(
+        required=False, default=10, min_value=1, max_value=100
+    )
+
+
+class TrendingTitlesSerializer(serializers.Serializer):
+    category = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        required=False, default=10, min_value=1, max_value=100
+    )
+
+
+class SimilarTitlesSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        required=False, default=10, min_value=1,
+        max_value=settings.SIMILAR_TITLES_COUNT
+    )
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+    )
+    path = serializers.RegexField(r'^/api/', max_length=2000)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = serializers.ListField(
+        child=BatchRequestSerializer(),
+        allow_empty=False,
+        max_length=settings.API_BATCH_MAX_REQUESTS
+    )
@@ -0,0 +1,42 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from api.authentication import forget_role_version, set_role_version
+from api.cache import bump_generation
+from api.catalog import invalidate
+from reviews.models import Category, Genre, Review, Title, User
+
+
+def bump_sender_generation(sender, **kwargs):
+    bump_generation(sender)
+
+
+def bump_title_generation(sender, **kwargs):
+    bump_generation(Title)
+
+
+for model in (Category, Genre, Title, Review):
+    post_save.connect(bump_sender_generation, sender=model)
+    post_delete.connect(bump_sender_generation, sender=model)
+m2m_changed.connect(bump_title_generation, sender=Title.genre.through)
+
+
+def invalidate_catalog(sender, **kwargs):
+    invalidate(sender)
+
+
+for model in (Category, Genre):
+    post_save.connect(invalidate_catalog, sender=model)
+    post_delete.connect(invalidate_catalog, sender=model)
+
+
+def store_role_version(sender, instance, raw=False, **kwargs):
+    if not raw:
+        set_role_version(instance.pk, instance.role_version)
+
+
+def drop_role_version(sender, instance, **kwargs):
+    forget_role_version(instance.pk)
+
+
+post_save.connect(store_role_version, sender=User)
+post_delete.connect(drop_role_version, sender=User)
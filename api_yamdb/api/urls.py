@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from api.views import (GenreViewSet, CategoryViewSet, TitleViewSet,
                        UserViewSet, ReviewViewSet, CommentViewSet, APISignUp,
-                       APITokenView)
+                       APITokenView, BatchView)
 
 app_name = 'api'
 
@@ -25,4 +25,5 @@ urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/signup/', APISignUp.as_view(), name='signup'),
     path('v1/auth/token/', APITokenView.as_view(), name='get_token'),
+    path('v1/batch/', BatchView.as_view(), name='batch'),
 ]
@@ -1,32 +1,59 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
 from rest_framework import filters, viewsets, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action
-from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.views import TokenViewBase
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from reviews.models import Category, Genre, Title, User
-from api.mixins import ReviewGenreModelMixin
-from api.filters import TitleFilter
+from reviews.models import Category, Genre, Review, Title, User
+from reviews.outbox import enqueue_email
+from reviews.ranking import top_title_ids
+from reviews.similarity import similar_title_ids
+from reviews.trending import record_event, trending_title_ids
+from api.authentication import get_token_for_user
+from api.batch import dispatch
+from api.catalog import get_by_slug
+from api.mixins import (BatchRetrieveMixin, CachedResponseMixin,
+                        CompiledListMixin, FacetCountsMixin,
+                        NestedResourceMixin, QuerysetOptimizerMixin,
+                        ReviewGenreModelMixin, StreamingResponseMixin)
+from api.filters import StableOrderingFilter, TitleFilter
+from api.pagination import OptionalCursorPagination
 from api.permissions import (IsAdminOrReadOnly, AuthorAndStaffOrReadOnly,
                              AdminOnly)
 from api.serializers import (CategorySerializer, GenreSerializer,
                              TitleSerializer, TitlesViewSerializer,
                              ReviewsSerializer, CommentsSerializer,
                              UserSerializer, TokenSerializer,
-                             SignUpSerializer, SignUpValidationSerializer,
-                             UserReadOnlySerializer)
+                             SignUpSerializer, UserReadOnlySerializer,
+                             BatchSerializer, TopTitlesSerializer,
+                             SimilarTitlesSerializer,
+                             TrendingTitlesSerializer)
 
+USER_CONFLICT_MESSAGE = (
+    'Пользователь с таким именем или адресом уже зарегистрирован'
+)
+REVIEW_CONFLICT_MESSAGE = 'Нельзя дважды писать отзыв к одному произведению!'
 
-class UserViewSet(viewsets.ModelViewSet):
+
+def save_unique(serializer, message, **kwargs):
+    try:
+        with transaction.atomic():
+            return serializer.save(**kwargs)
+    except IntegrityError:
+        raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+
+
+class UserViewSet(QuerysetOptimizerMixin, viewsets.ModelViewSet):
     permission_classes = [AdminOnly, IsAuthenticated, ]
     serializer_class = UserSerializer
     queryset = User.objects.all()
@@ -34,11 +61,25 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ['username', ]
     lookup_field = 'username'
     http_method_names = ['get', 'post', 'patch', 'delete', ]
+    # Удаление пользователя каскадом удаляет его отзывы и комментарии
+    # и пересчитывает рейтинги произведений.
+    query_budget = {
+        'list': 4, 'retrieve': 4, 'create': 5, 'partial_update': 5,
+        'destroy': 10, 'me': 3,
+    }
+
+    def perform_create(self, serializer):
+        save_unique(serializer, USER_CONFLICT_MESSAGE)
+
+    def perform_update(self, serializer):
+        save_unique(serializer, USER_CONFLICT_MESSAGE)
 
     @action(detail=False, permission_classes=[IsAuthenticated], url_path='me',
             methods=['GET', 'PATCH'])
     def me(self, request):
         user = request.user
+        if user.get_deferred_fields():
+            user = User.objects.get(pk=user.pk)
         if request.method == 'GET':
             serializer = UserSerializer(user)
             return Response(
@@ -50,7 +91,7 @@ class UserViewSet(viewsets.ModelViewSet):
                 data=request.data,
                 partial=True)
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            save_unique(serializer, USER_CONFLICT_MESSAGE)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK)
@@ -65,9 +106,9 @@ class APITokenView(TokenViewBase):
         username = serializer.validated_data.get('username')
         user = get_object_or_404(User, username=username)
         if default_token_generator.check_token(
-            user, serializer.validated_data.get('Код')
+            user, serializer.validated_data.get('confirmation_code')
         ):
-            token = AccessToken.for_user(user)
+            token = get_token_for_user(user)
             return Response({'Токен': f'{token}'}, status=status.HTTP_200_OK)
         return Response(
             {'Код': ['Код подтверждения недействителен!']},
@@ -77,36 +118,140 @@ class APITokenView(TokenViewBase):
 
 class APISignUp(APIView):
     permission_classes = (AllowAny,)
+    conflict_messages = {
+        'username': 'Пользователь с таким именем уже зарегистрирован',
+        'email': 'Пользователь с таким адресом уже зарегистрирован',
+    }
+
+    def get_user(self, username, email):
+        # Один запрос по индексам LOWER(username) и LOWER(email).
+        users = User.objects.annotate(
+            username_lower=Lower('username'), email_lower=Lower('email')
+        ).filter(
+            Q(username_lower=Lower(Value(username)))
+            | Q(email_lower=Lower(Value(email)))
+        )[:2]
+        errors = {}
+        for user in users:
+            same_username = user.username.lower() == username.lower()
+            same_email = user.email.lower() == email.lower()
+            if same_username and same_email:
+                return user
+            if same_username:
+                errors['username'] = [self.conflict_messages['username']]
+            if same_email:
+                errors['email'] = [self.conflict_messages['email']]
+        if errors:
+            raise ValidationError(errors)
+        return None
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         username = serializer.validated_data.get('username')
         email = serializer.validated_data.get('email')
-        try:
-            user = User.objects.get(
-                username__iexact=username, email__iexact=email)
-        except User.DoesNotExist:
-            user_serializer = SignUpValidationSerializer(data=request.data)
-            user_serializer.is_valid(raise_exception=True)
-            user = user_serializer.save()
-        confirmation_code = default_token_generator.make_token(user)
-        mail_subject = 'Код подтверждения для получения токена'
-        message = f'Код - {confirmation_code}'
-        send_mail(mail_subject, message, settings.EMAIL, (email, ))
+        user = self.get_user(username, email)
+        # Письмо ставится в очередь в той же транзакции, что и создание
+        # пользователя, и отправляется обработчиком send_outbox.
+        with transaction.atomic():
+            if user is None:
+                try:
+                    with transaction.atomic():
+                        user = User.objects.create(
+                            username=username, email=email
+                        )
+                except IntegrityError:
+                    # Параллельная регистрация успела раньше: повторная
+                    # проверка вернёт пользователя или понятную ошибку 400.
+                    user = self.get_user(username, email)
+                    if user is None:
+                        raise
+            confirmation_code = default_token_generator.make_token(user)
+            mail_subject = 'Код подтверждения для получения токена'
+            message = f'Код - {confirmation_code}'
+            enqueue_email(mail_subject, message, email)
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+class TitleViewSet(CachedResponseMixin, FacetCountsMixin,
+                   BatchRetrieveMixin, StreamingResponseMixin,
+                   QuerysetOptimizerMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.all()
     serializer_class = TitleSerializer
+    lookup_value_regex = r'\d+'
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = PageNumberPagination
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('name', 'year', 'weighted_rating')
+    cache_models = (Title, Category, Genre, Review)
+    query_budget = {
+        'list': 7, 'retrieve': 3, 'create': 12, 'batch': 3, 'top': 3,
+        'similar': 4, 'trending': 3, 'update': 24, 'partial_update': 24,
+        'destroy': 14,
+    }
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+        # Просмотр засчитывается только найденному произведению.
+        if response.status_code == status.HTTP_200_OK:
+            record_event('view', int(kwargs['pk']))
+        return response
+
+    @action(detail=False, url_path='top')
+    def top(self, request):
+        return self.cached_response(self.top_titles, request)
+
+    def top_titles(self, request):
+        params = TopTitlesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = dict(params.validated_data)
+        for name, model in (('category', Category), ('genre', Genre)):
+            if name in filters:
+                obj = get_by_slug(model, filters.pop(name))
+                if obj is None:
+                    return Response({'results': []})
+                filters[f'{name}_id'] = obj.pk
+        results, _ = self.render_ids(top_title_ids(**filters))
+        return Response({'results': results})
+
+    @action(detail=False, url_path='trending')
+    def trending(self, request):
+        # Счётчики меняются при каждом сбросе, поэтому ответ не кэшируется.
+        params = TrendingTitlesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        category_id = None
+        if 'category' in params.validated_data:
+            category = get_by_slug(
+                Category, params.validated_data['category']
+            )
+            if category is None:
+                return Response({'results': []})
+            category_id = category.pk
+        results, _ = self.render_ids(trending_title_ids(
+            category_id, params.validated_data['limit']
+        ))
+        return Response({'results': results})
+
+    @action(detail=True, url_path='similar')
+    def similar(self, request, pk=None):
+        return self.cached_response(self.similar_titles, request, pk)
+
+    def similar_titles(self, request, pk):
+        title = get_object_or_404(Title.objects.only('pk'), pk=pk)
+        params = SimilarTitlesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        results, _ = self.render_ids(
+            similar_title_ids(title.pk, params.validated_data['limit'])
+        )
+        return Response({'results': results})
 
     def get_serializer_class(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in [
+            'list', 'retrieve', 'batch', 'top', 'similar', 'trending'
+        ]:
             return TitlesViewSerializer
         return TitleSerializer
 
@@ -114,37 +259,71 @@ class TitleViewSet(viewsets.ModelViewSet):
 class CategoryViewSet(ReviewGenreModelMixin):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
 
 
 class GenreViewSet(ReviewGenreModelMixin):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(NestedResourceMixin, CompiledListMixin,
+                    StreamingResponseMixin, QuerysetOptimizerMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewsSerializer
     permission_classes = [AuthorAndStaffOrReadOnly, ]
+    pagination_class = OptionalCursorPagination
+    query_budget = {
+        'list': 4, 'retrieve': 3, 'create': 9, 'update': 8,
+        'partial_update': 8, 'destroy': 9,
+    }
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return self.get_title().reviews.all()
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        # Review.save() сам выполняется в транзакции, поэтому нарушение
+        # unique_review откатывает только эту вставку.
+        try:
+            serializer.save(author=self.request.user, title=self.get_title())
+        except IntegrityError:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [REVIEW_CONFLICT_MESSAGE]}
+            )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(NestedResourceMixin, CompiledListMixin,
+                     StreamingResponseMixin, QuerysetOptimizerMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentsSerializer
     permission_classes = [AuthorAndStaffOrReadOnly]
+    pagination_class = OptionalCursorPagination
+    query_budget = {
+        'list': 4, 'retrieve': 3, 'create': 3, 'update': 4,
+        'partial_update': 4, 'destroy': 4,
+    }
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        review = title.reviews.get(id=self.kwargs.get('review_id'))
-        queryset = review.comments.all()
-        return queryset
+        return self.get_review().comments.all()
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        review = title.reviews.get(id=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
+
+
+class BatchView(APIView):
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        responses = []
+        # Подзапросы выполняются по очереди в этом же процессе и
+        # проверяют права своих представлений.
+        for sub_request in serializer.validated_data['requests']:
+            status_code, body = dispatch(
+                request, sub_request['method'], sub_request['path'],
+                sub_request.get('body'), batch_view=BatchView
+            )
+            responses.append({'status': status_code, 'body': body})
+        return Response({'responses': responses})
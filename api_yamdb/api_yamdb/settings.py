@@ -29,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,11 +63,48 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'api_yamdb.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+                'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+                'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64000)),
+                'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 268435456)),
+                'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+                'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+            },
+            'write_retries': int(os.getenv('SQLITE_WRITE_RETRIES', 5)),
+            'retry_backoff': float(os.getenv('SQLITE_RETRY_BACKOFF', 0.05)),
+            'health_checks': True,
+        },
+    }
+}
+
+# Поколения кэша должны быть общими для всех процессов: иначе команды
+# управления и соседние воркеры не сбрасывают кэш сервера. LocMemCache
+# живёт в памяти одного процесса и подходит только для тестов.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 5000)),
+        },
     }
 }
 
+API_RESPONSE_CACHE_ALIAS = 'default'
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', 300))
+CATALOG_SNAPSHOT_MAX_AGE = int(os.getenv('CATALOG_SNAPSHOT_MAX_AGE', 60))
+FACET_INDEX_MAX_AGE = int(os.getenv('FACET_INDEX_MAX_AGE', 300))
+
+QUERY_BUDGET_RAISE = os.getenv('QUERY_BUDGET_RAISE', 'False') == 'True'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -103,7 +141,7 @@ AUTH_USER_MODEL = 'reviews.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -111,15 +149,51 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10
 }
 
+TOP_TITLES_MIN_REVIEWS = int(os.getenv('TOP_TITLES_MIN_REVIEWS', 5))
+
+# Значения по умолчанию для категорий без собственных настроек.
+WEIGHTED_RATING_PRIOR_MEAN = float(
+    os.getenv('WEIGHTED_RATING_PRIOR_MEAN', 5.5)
+)
+WEIGHTED_RATING_PRIOR_WEIGHT = int(
+    os.getenv('WEIGHTED_RATING_PRIOR_WEIGHT', 10)
+)
+
+SIMILAR_TITLES_COUNT = int(os.getenv('SIMILAR_TITLES_COUNT', 20))
+
+TRENDING_HALF_LIFE = int(os.getenv('TRENDING_HALF_LIFE', 24 * 3600))
+TRENDING_FLUSH_INTERVAL = float(os.getenv('TRENDING_FLUSH_INTERVAL', 10))
+TRENDING_WEIGHTS = {'review': 5.0, 'comment': 2.0, 'view': 1.0}
+
+API_BATCH_MAX_REQUESTS = int(os.getenv('API_BATCH_MAX_REQUESTS', 20))
+
+JSON_STREAM_MIN_ITEMS = int(os.getenv('JSON_STREAM_MIN_ITEMS', 500))
+JSON_STREAM_CHUNK_SIZE = int(os.getenv('JSON_STREAM_CHUNK_SIZE', 100))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+TOKEN_USER_CACHE_TTL = int(os.getenv('TOKEN_USER_CACHE_TTL', 5))
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'send_email')
 EMAIL = 'yamdm@localhost'
+EMAIL_OUTBOX_EAGER = os.getenv('EMAIL_OUTBOX_EAGER', 'False') == 'True'
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_BACKOFF = int(os.getenv('EMAIL_OUTBOX_BACKOFF', 30))
+EMAIL_OUTBOX_LEASE = int(os.getenv('EMAIL_OUTBOX_LEASE', 300))
@@ -0,0 +1,72 @@
+import random
+import time
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, *args, **kwargs):
+        settings_dict = {
+            **settings_dict, 'OPTIONS': dict(settings_dict['OPTIONS'])
+        }
+        options = settings_dict['OPTIONS']
+        self.pragmas = {**DEFAULT_PRAGMAS, **options.pop('pragmas', {})}
+        self.write_retries = options.pop('write_retries', 5)
+        self.retry_backoff = options.pop('retry_backoff', 0.05)
+        self.health_checks = options.pop('health_checks', True)
+        super().__init__(settings_dict, *args, **kwargs)
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        # busy_timeout первым: смена journal_mode сама требует блокировки.
+        pragmas = dict(self.pragmas)
+        busy_timeout = pragmas.pop('busy_timeout', None)
+        if busy_timeout is not None:
+            conn.execute(f'PRAGMA busy_timeout = {int(busy_timeout)}')
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # BEGIN IMMEDIATE берёт блокировку записи сразу, поэтому
+        # повторить его безопасно: внутри транзакции ещё ничего не сделано.
+        for attempt in range(self.write_retries + 1):
+            try:
+                self.cursor().execute('BEGIN IMMEDIATE')
+                return
+            except OperationalError as error:
+                if (
+                    'locked' not in str(error)
+                    or attempt == self.write_retries
+                ):
+                    raise
+                delay = self.retry_backoff * 2 ** attempt
+                time.sleep(delay + random.uniform(0, delay))
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        if (
+            self.connection is not None
+            and self.health_checks
+            and self.get_autocommit()
+            and not self.is_usable()
+        ):
+            self.close()
+            return
+        super().close_if_unusable_or_obsolete()
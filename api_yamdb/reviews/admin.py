@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from .models import User, Genre, Category, Title, Review, Comment
+from .models import (
+    User, Genre, Category, Title, Review, Comment, OutgoingEmail
+)
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -79,9 +81,24 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('author',)
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'recipient',
+        'subject',
+        'created',
+        'attempts',
+        'sent_at',
+    )
+    list_filter = ('sent_at',)
+    search_fields = ('recipient',)
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(User, UserAdmin)
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Title, TitleAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
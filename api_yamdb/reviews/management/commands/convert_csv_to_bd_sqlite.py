@@ -1,98 +1,203 @@
+import time
+from contextlib import contextmanager
 from csv import DictReader
+from itertools import islice
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from reviews.models import (User, Category, Genre, Title,
-                            GenreTitle, Review, Comment)
+from django.db import transaction
+
+from api.cache import bump_generation
+from reviews.models import User, Category, Genre, Title, Review, Comment
+from reviews.ranking import rebuild_ranking
+from reviews.ratings import rebuild_ratings
+from reviews.search import rebuild_index
+
+GenreTitle = Title.genre.through
+
+
+@contextmanager
+def keep_pub_date(*models):
+    # auto_now_add перезаписал бы даты публикации из выгрузки.
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
 
 
 class Command(BaseCommand):
     help = 'Загрузка данных из csv-файлов в базу данных'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=str(settings.BASE_DIR / 'static' / 'data'),
+            help='Каталог с csv-файлами'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк в одном INSERT'
+        )
+
     def handle(self, *args, **options):
+        self.path = options['path']
+        self.batch_size = options['batch_size']
         self.stdout.write(
             self.style.SUCCESS('Загрузка данных началась')
         )
 
-        for row in DictReader(
-            open('./static/data/category.csv', encoding='utf-8', mode='r')
-        ):
-            category = Category(
-                id=row['id'],
-                name=row['name'],
-                slug=row['slug']
-            )
-            category.save()
-
-        for row in DictReader(
-            open('./static/data/genre.csv', encoding='utf-8', mode='r')
-        ):
-            genre = Genre(
-                id=row['id'],
-                name=row['name'],
-                slug=row['slug']
-            )
-            genre.save()
-
-        for row in DictReader(
-            open('./static/data/titles.csv', encoding='utf-8', mode='r')
-        ):
-            title = Title(
-                id=row['id'],
-                name=row['name'],
-                year=row['year'],
-                category=Category.objects.get(pk=row['category'])
-            )
-            title.save()
-
-        for row in DictReader(
-            open('./static/data/users.csv', encoding='utf-8', mode='r')
-        ):
-            user = User(
-                id=row['id'],
-                username=row['username'],
-                first_name=row['first_name'],
-                last_name=row['last_name'],
-                email=row['email'],
-                role=row['role'],
-                bio=row['bio']
-            )
-            user.save()
-
-        for row in DictReader(
-            open('./static/data/genre_title.csv', encoding='utf-8', mode='r')
-        ):
-            genre_title = GenreTitle(
-                id=row['id'],
-                genre=Genre.objects.get(pk=row['genre_id']),
-                title=Title.objects.get(pk=row['title_id'])
-            )
-            genre_title.save()
-
-        for row in DictReader(
-            open('./static/data/review.csv', encoding='utf-8', mode='r')
-        ):
-            review = Review(
-                id=row['id'],
-                title=Title.objects.get(pk=row['title_id']),
-                text=row['text'],
-                author=User.objects.get(pk=row['author']),
-                score=row['score'],
-                pub_date=row['pub_date']
+        category_ids = self.load('category.csv', Category, self.category)
+        genre_ids = self.load('genre.csv', Genre, self.genre)
+        title_ids = self.load(
+            'titles.csv', Title, lambda row: self.title(row, category_ids)
+        )
+        user_ids = self.load('users.csv', User, self.user)
+        self.load(
+            'genre_title.csv', GenreTitle,
+            lambda row: self.genre_title(row, genre_ids, title_ids)
+        )
+        with keep_pub_date(Review, Comment):
+            review_ids = self.load(
+                'review.csv', Review,
+                lambda row: self.review(row, title_ids, user_ids)
             )
-            review.save()
-
-        for row in DictReader(
-            open('./static/data/comments.csv', encoding='utf-8', mode='r')
-        ):
-            comment = Comment(
-                id=row['id'],
-                review=Review.objects.get(pk=row['review_id']),
-                text=row['text'],
-                author=User.objects.get(pk=row['author']),
-                pub_date=row['pub_date']
+            self.load(
+                'comments.csv', Comment,
+                lambda row: self.comment(row, review_ids, user_ids)
             )
-            comment.save()
+        rebuild_ratings()
+        rebuild_ranking()
+        rebuild_index(Title.objects.all(), self.batch_size)
+        bump_generation(Category, Genre, Title, Review)
 
         self.stdout.write(
             self.style.SUCCESS('Загрузка данных завершена')
         )
+
+    def load(self, filename, model, build):
+        known_ids = set(model.objects.values_list('id', flat=True))
+        started = time.monotonic()
+        created = skipped = conflicts = 0
+        with open(
+            f'{self.path}/{filename}', encoding='utf-8', mode='r'
+        ) as csv_file, transaction.atomic():
+            objects = (build(row) for row in DictReader(csv_file))
+            while True:
+                batch = list(islice(objects, self.batch_size))
+                if not batch:
+                    break
+                valid = [obj for obj in batch if obj is not None]
+                skipped += len(batch) - len(valid)
+                model.objects.bulk_create(valid, ignore_conflicts=True)
+                inserted = self.inserted_ids(model, valid) - known_ids
+                known_ids.update(inserted)
+                created += len(inserted)
+                conflicts += len(valid) - len(inserted)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{filename}: {created} строк, '
+                    f'{created / elapsed if elapsed else 0:.0f} строк/с'
+                )
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'{filename}: пропущено строк с неизвестными ссылками: '
+                f'{skipped}'
+            ))
+        if conflicts:
+            self.stdout.write(self.style.WARNING(
+                f'{filename}: пропущено строк, конфликтующих с уже '
+                f'загруженными: {conflicts}'
+            ))
+        return known_ids
+
+    @staticmethod
+    def inserted_ids(model, batch):
+        # ignore_conflicts молча отбрасывает строки с занятым id или
+        # нарушающие уникальность, поэтому ссылки разрешаются только
+        # на реально вставленные строки. Выборка по диапазону, а не
+        # по списку id, не упирается в лимит параметров SQLite.
+        ids = {obj.id for obj in batch}
+        if not ids:
+            return ids
+        return ids & set(
+            model.objects.filter(id__gte=min(ids), id__lte=max(ids))
+            .values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def category(row):
+        return Category(id=int(row['id']), name=row['name'],
+                        slug=row['slug'])
+
+    @staticmethod
+    def genre(row):
+        return Genre(id=int(row['id']), name=row['name'], slug=row['slug'])
+
+    @staticmethod
+    def title(row, category_ids):
+        category_id = int(row['category'])
+        if category_id not in category_ids:
+            return None
+        return Title(
+            id=int(row['id']),
+            name=row['name'],
+            year=int(row['year']),
+            description=row.get('description') or None,
+            category_id=category_id
+        )
+
+    @staticmethod
+    def user(row):
+        return User(
+            id=int(row['id']),
+            username=row['username'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            email=row['email'],
+            role=row['role'],
+            bio=row['bio']
+        )
+
+    @staticmethod
+    def genre_title(row, genre_ids, title_ids):
+        genre_id = int(row['genre_id'])
+        title_id = int(row['title_id'])
+        if genre_id not in genre_ids or title_id not in title_ids:
+            return None
+        return GenreTitle(id=int(row['id']), genre_id=genre_id,
+                          title_id=title_id)
+
+    @staticmethod
+    def review(row, title_ids, user_ids):
+        title_id = int(row['title_id'])
+        author_id = int(row['author'])
+        if title_id not in title_ids or author_id not in user_ids:
+            return None
+        return Review(
+            id=int(row['id']),
+            title_id=title_id,
+            text=row['text'],
+            author_id=author_id,
+            score=int(row['score']),
+            pub_date=row['pub_date']
+        )
+
+    @staticmethod
+    def comment(row, review_ids, user_ids):
+        review_id = int(row['review_id'])
+        author_id = int(row['author'])
+        if review_id not in review_ids or author_id not in user_ids:
+            return None
+        return Comment(
+            id=int(row['id']),
+            review_id=review_id,
+            text=row['text'],
+            author_id=author_id,
+            pub_date=row['pub_date']
+        )
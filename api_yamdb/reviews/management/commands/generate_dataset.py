@@ -0,0 +1,296 @@
+import csv
+import random
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import bump_generation
+from reviews.management.commands.convert_csv_to_bd_sqlite import (
+    keep_pub_date
+)
+from reviews.models import User, Category, Genre, Title, Review, Comment
+from reviews.ranking import rebuild_ranking
+from reviews.ratings import rebuild_ratings
+from reviews.search import rebuild_index
+
+GenreTitle = Title.genre.through
+
+WORDS = (
+    'тайна', 'дорога', 'город', 'ночь', 'звезда', 'море', 'война', 'мир',
+    'сердце', 'тень', 'огонь', 'река', 'время', 'дом', 'песня', 'ветер',
+)
+PHRASES = (
+    'Сильная работа, рекомендую.', 'Ожидал большего.', 'Шедевр!',
+    'Средне, но посмотреть можно.', 'Не моё.', 'Пересматриваю каждый год.',
+)
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+DATE_RANGE_SECONDS = 8 * 365 * 24 * 3600
+
+FILES = {
+    'category.csv': ('id', 'name', 'slug'),
+    'genre.csv': ('id', 'name', 'slug'),
+    'titles.csv': ('id', 'name', 'year', 'category'),
+    'users.csv': (
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'
+    ),
+    'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    'review.csv': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'comments.csv': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+MODELS = {
+    'category.csv': (Category, lambda row: Category(**row)),
+    'genre.csv': (Genre, lambda row: Genre(**row)),
+    'titles.csv': (Title, lambda row: Title(
+        id=row['id'], name=row['name'], year=row['year'],
+        category_id=row['category']
+    )),
+    'users.csv': (User, lambda row: User(**row)),
+    'genre_title.csv': (GenreTitle, lambda row: GenreTitle(**row)),
+    'review.csv': (Review, lambda row: Review(
+        id=row['id'], title_id=row['title_id'], text=row['text'],
+        author_id=row['author'], score=row['score'],
+        pub_date=row['pub_date']
+    )),
+    'comments.csv': (Comment, lambda row: Comment(
+        id=row['id'], review_id=row['review_id'], text=row['text'],
+        author_id=row['author'], pub_date=row['pub_date']
+    )),
+}
+
+
+def zipf_weights(size, exponent):
+    return [1 / rank ** exponent for rank in range(1, size + 1)]
+
+
+def allocate(total, weights, cap):
+    # Делим total пропорционально весам, не превышая cap на элемент;
+    # остаток раздаём начиная с самых популярных.
+    weight_sum = sum(weights)
+    counts = [min(cap, int(total * weight / weight_sum)) for weight in weights]
+    left = total - sum(counts)
+    while left > 0:
+        progress = False
+        for index in range(len(counts)):
+            if left == 0:
+                break
+            if counts[index] < cap:
+                counts[index] += 1
+                left -= 1
+                progress = True
+        if not progress:
+            break
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетического набора данных для нагрузочных тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument(
+            '--max-genres', type=int, default=3,
+            help='Максимальное количество жанров у произведения'
+        )
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения Ципфа для популярности'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--output',
+            help='Каталог для csv-файлов; без него данные пишутся в базу'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        for name in ('users', 'categories', 'genres', 'titles'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} должно быть больше нуля')
+        capacity = options['users'] * options['titles']
+        if options['reviews'] > capacity:
+            raise CommandError(
+                'Отзывов больше, чем пар пользователь-произведение: '
+                f'{capacity}'
+            )
+        self.title_weights = zipf_weights(options['titles'], options['zipf'])
+        self.review_counts = allocate(
+            options['reviews'], self.title_weights, options['users']
+        )
+        self.review_offsets = [0, *accumulate(self.review_counts)]
+
+        generators = {
+            'category.csv': self.categories,
+            'genre.csv': self.genres,
+            'titles.csv': self.titles,
+            'users.csv': self.users,
+            'genre_title.csv': self.genre_titles,
+            'review.csv': self.reviews,
+            'comments.csv': self.comments,
+        }
+        output = options['output']
+        if output:
+            Path(output).mkdir(parents=True, exist_ok=True)
+            for filename, generate in generators.items():
+                self.write_csv(Path(output) / filename, generate())
+        else:
+            if Title.objects.exists() or User.objects.exists():
+                raise CommandError(
+                    'База данных не пуста: укажите --output или '
+                    'очистите базу перед генерацией'
+                )
+            with keep_pub_date(Review, Comment):
+                for filename, generate in generators.items():
+                    self.write_db(filename, generate())
+            rebuild_ratings()
+            rebuild_ranking()
+            rebuild_index(Title.objects.all(), options['batch_size'])
+            bump_generation(Category, Genre, Title, Review)
+        self.stdout.write(self.style.SUCCESS('Генерация данных завершена'))
+
+    def progress(self, label, count, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{label}: {count} строк, '
+            f'{count / elapsed if elapsed else 0:.0f} строк/с'
+        )
+
+    def write_csv(self, path, rows):
+        started = time.monotonic()
+        count = 0
+        with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, FILES[path.name])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        self.progress(path.name, count, started)
+
+    def write_db(self, filename, rows):
+        model, build = MODELS[filename]
+        objects = (build(row) for row in rows)
+        started = time.monotonic()
+        count = 0
+        with transaction.atomic():
+            while True:
+                batch = list(islice(objects, self.options['batch_size']))
+                if not batch:
+                    break
+                model.objects.bulk_create(batch)
+                count += len(batch)
+        self.progress(filename, count, started)
+
+    def pub_date(self):
+        return (
+            START_DATE
+            + timedelta(seconds=self.rng.randrange(DATE_RANGE_SECONDS))
+        ).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+    def categories(self):
+        for pk in range(1, self.options['categories'] + 1):
+            yield {'id': pk, 'name': f'Категория {pk}',
+                   'slug': f'category-{pk}'}
+
+    def genres(self):
+        for pk in range(1, self.options['genres'] + 1):
+            yield {'id': pk, 'name': f'Жанр {pk}', 'slug': f'genre-{pk}'}
+
+    def titles(self):
+        category_weights = list(accumulate(
+            zipf_weights(self.options['categories'], self.options['zipf'])
+        ))
+        for pk in range(1, self.options['titles'] + 1):
+            words = self.rng.sample(WORDS, 2)
+            category = self.rng.choices(
+                range(1, self.options['categories'] + 1),
+                cum_weights=category_weights
+            )[0]
+            yield {
+                'id': pk,
+                'name': f'{words[0].capitalize()} {words[1]} {pk}',
+                'year': self.rng.randint(1900, 2023),
+                'category': category,
+            }
+
+    def users(self):
+        for pk in range(1, self.options['users'] + 1):
+            roll = self.rng.random()
+            role = (
+                User.ADMIN if roll < 0.001
+                else User.MODERATOR if roll < 0.01
+                else User.USER
+            )
+            yield {
+                'id': pk,
+                'username': f'user{pk}',
+                'email': f'user{pk}@yamdb.fake',
+                'role': role,
+                'bio': '',
+                'first_name': '',
+                'last_name': '',
+            }
+
+    def genre_titles(self):
+        pk = 0
+        genres = range(1, self.options['genres'] + 1)
+        max_genres = min(self.options['max_genres'], len(genres))
+        for title_id in range(1, self.options['titles'] + 1):
+            for genre_id in self.rng.sample(
+                genres, self.rng.randint(1, max_genres)
+            ):
+                pk += 1
+                yield {'id': pk, 'title_id': title_id, 'genre_id': genre_id}
+
+    def reviews(self):
+        pk = 0
+        users = range(1, self.options['users'] + 1)
+        for title_id, count in enumerate(self.review_counts, 1):
+            quality = self.rng.gauss(7, 1.5)
+            for author in self.rng.sample(users, count):
+                pk += 1
+                score = min(10, max(1, round(self.rng.gauss(quality, 1.5))))
+                yield {
+                    'id': pk,
+                    'title_id': title_id,
+                    'text': self.rng.choice(PHRASES),
+                    'author': author,
+                    'score': score,
+                    'pub_date': self.pub_date(),
+                }
+
+    def comments(self):
+        # Комментируют популярные произведения: выбираем произведение
+        # по Ципфу среди имеющих отзывы, затем любой его отзыв.
+        offsets = self.review_offsets
+        reviewed = [
+            index for index, count in enumerate(self.review_counts) if count
+        ]
+        if not reviewed:
+            return
+        cum_weights = list(accumulate(
+            self.title_weights[index] for index in reviewed
+        ))
+        for pk in range(1, self.options['comments'] + 1):
+            point = self.rng.random() * cum_weights[-1]
+            index = reviewed[bisect_left(cum_weights, point)]
+            review_id = self.rng.randint(
+                offsets[index] + 1, offsets[index + 1]
+            )
+            yield {
+                'id': pk,
+                'review_id': review_id,
+                'text': self.rng.choice(PHRASES),
+                'author': self.rng.randint(1, self.options['users']),
+                'pub_date': self.pub_date(),
+            }
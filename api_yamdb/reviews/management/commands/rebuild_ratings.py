@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_generation
+from reviews.models import Title
+from reviews.ranking import rebuild_ranking
+from reviews.ratings import find_rating_drift, rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт суммы оценок и количества отзывов произведений '
+        'и таблицы лучших произведений'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество произведений, обрабатываемых за один запрос'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сообщить о расхождениях, ничего не изменяя'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if options['check']:
+            drift = 0
+            for title, score_sum, review_count in find_rating_drift(
+                chunk_size
+            ):
+                drift += 1
+                self.stdout.write(
+                    f'Произведение {title.pk}: сохранено '
+                    f'{title.score_sum}/{title.review_count}, '
+                    f'фактически {score_sum}/{review_count}'
+                )
+            if drift:
+                self.stdout.write(
+                    self.style.WARNING(f'Расхождений найдено: {drift}')
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        updated = rebuild_ratings(chunk_size)
+        ranked = rebuild_ranking(chunk_size)
+        if updated:
+            bump_generation(Title)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено произведений: {updated}')
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Произведений в рейтинге: {ranked}')
+        )
@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_generation
+from reviews.models import Title
+from reviews.similarity import METHODS, rebuild_similar_titles
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт похожих произведений по оценкам пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale',
+            action='store_true',
+            help='Пересчитать только произведения с изменившимися отзывами'
+        )
+        parser.add_argument(
+            '--neighbours',
+            type=int,
+            default=settings.SIMILAR_TITLES_COUNT,
+            help='Количество сохраняемых соседей произведения'
+        )
+        parser.add_argument(
+            '--min-common',
+            type=int,
+            default=2,
+            help='Минимальное количество общих пользователей у пары'
+        )
+        parser.add_argument(
+            '--method',
+            choices=METHODS,
+            default='adjusted',
+            help='adjusted - косинус после вычитания средней оценки '
+                 'пользователя, cosine - косинус по самим оценкам'
+        )
+        parser.add_argument(
+            '--max-user-reviews',
+            type=int,
+            default=0,
+            help='Не учитывать пользователей с большим числом отзывов '
+                 '(0 - без ограничения)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=100,
+            help='Количество произведений, обрабатываемых за один запрос'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        processed = rebuild_similar_titles(
+            options['neighbours'],
+            min_common=options['min_common'],
+            method=options['method'],
+            max_user_reviews=options['max_user_reviews'],
+            chunk_size=options['chunk_size'],
+            stale=options['stale'],
+        )
+        bump_generation(Title)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано произведений: {processed} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_generation
+from reviews.models import Title
+from reviews.ratings import update_weighted_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчёт взвешенного рейтинга всех произведений, например '
+        'после изменения априорных оценок'
+    )
+
+    def handle(self, *args, **options):
+        updated = update_weighted_ratings()
+        bump_generation(Title)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено произведений: {updated}')
+        )
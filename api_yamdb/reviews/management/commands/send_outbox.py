@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди исходящей почты'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Количество писем, отправляемых за одно соединение'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать непрерывно, опрашивая очередь'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди, в секундах'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.drain(options['batch_size'])
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def drain(self, batch_size):
+        # Забираем пачки, пока в очереди есть письма к отправке; письма
+        # с ошибкой откладываются, поэтому повторно в этот проход не попадут.
+        while True:
+            sent, failed = deliver_pending(batch_size)
+            if not sent and not failed:
+                break
+            self.stdout.write(f'Отправлено: {sent}, ошибок: {failed}')
@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-18 18:12
+
+from django.db import OperationalError, migrations, transaction
+
+from reviews.search import FTS_TABLE, INSERT_SQL, create_index, normalize
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    Title = apps.get_model('reviews', 'Title')
+    with connection.cursor() as cursor:
+        try:
+            with transaction.atomic(using=connection.alias):
+                create_index(cursor)
+        except OperationalError:
+            # Сборка SQLite без FTS5: поиск работает через LIKE.
+            return
+        cursor.executemany(INSERT_SQL, [
+            (pk, normalize(name), normalize(description))
+            for pk, name, description in Title.objects.values_list(
+                'pk', 'name', 'description'
+            ).iterator()
+        ])
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_review_comment_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
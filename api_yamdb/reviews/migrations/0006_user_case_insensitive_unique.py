@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 18:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_user_role_version'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX user_username_lower_uniq '
+            'ON reviews_user (LOWER(username));',
+            'DROP INDEX user_username_lower_uniq;',
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX user_email_lower_uniq '
+            'ON reviews_user (LOWER(email));',
+            'DROP INDEX user_email_lower_uniq;',
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2 on 2026-10-18 18:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_ranking(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    GenreTitle = Title.genre.through
+    genres = {}
+    for title_id, genre_id in GenreTitle.objects.values_list(
+        'title_id', 'genre_id'
+    ).iterator():
+        genres.setdefault(title_id, []).append(genre_id)
+    titles = Title.objects.filter(
+        review_count__gte=max(settings.TOP_TITLES_MIN_REVIEWS, 1)
+    )
+    rows = []
+    for title in titles.iterator():
+        for genre_id in (None, *genres.get(title.pk, ())):
+            rows.append(TitleRanking(
+                title_id=title.pk,
+                genre_id=genre_id,
+                category_id=title.category_id,
+                year=title.year,
+                rating=title.score_sum / title.review_count,
+                review_count=title.review_count,
+            ))
+    TitleRanking.objects.bulk_create(rows, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='Год релиза')),
+                ('rating', models.FloatField(verbose_name='Рейтинг')),
+                ('review_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.category')),
+                ('genre', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.genre')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.title')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['genre', '-rating', '-review_count', 'title'], name='ranking_genre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['category', 'genre', '-rating', '-review_count', 'title'], name='ranking_category_genre_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='unique_title_genre_ranking'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(condition=models.Q(genre__isnull=True), fields=('title',), name='unique_title_ranking'),
+        ),
+        migrations.RunPython(fill_ranking, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-18 18:47
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField
+
+
+def fill_weighted_rating(apps, schema_editor):
+    # Собственных настроек у категорий ещё нет: берём значения
+    # по умолчанию.
+    Title = apps.get_model('reviews', 'Title')
+    mean = float(settings.WEIGHTED_RATING_PRIOR_MEAN)
+    weight = float(settings.WEIGHTED_RATING_PRIOR_WEIGHT)
+    Title.objects.filter(review_count__gt=0).update(
+        weighted_rating=ExpressionWrapper(
+            (mean * weight + F('score_sum')) / (weight + F('review_count')),
+            output_field=FloatField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_ranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='rating_prior_mean',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(10)], verbose_name='Априорная средняя оценка'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='rating_prior_weight',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Вес априорной оценки'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(db_index=True, editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.RunPython(
+            fill_weighted_rating, migrations.RunPython.noop
+        ),
+    ]
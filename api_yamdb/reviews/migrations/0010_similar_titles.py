@@ -0,0 +1,57 @@
+# Generated by Django 3.2 on 2026-10-18 18:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_reviewed_titles(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.filter(review_count__gt=0).update(similar_stale=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_weighted_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarTitle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('common', models.PositiveIntegerField(verbose_name='Общих пользователей')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='similar_stale',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Похожие произведения устарели'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(similar_stale=True), fields=['id'], name='title_similar_stale_idx'),
+        ),
+        migrations.AddField(
+            model_name='similartitle',
+            name='similar',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.title'),
+        ),
+        migrations.AddField(
+            model_name='similartitle',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar', to='reviews.title'),
+        ),
+        migrations.AddIndex(
+            model_name='similartitle',
+            index=models.Index(fields=['title', '-score', 'similar'], name='similar_title_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='similartitle',
+            constraint=models.UniqueConstraint(fields=('title', 'similar'), name='unique_similar_title'),
+        ),
+        migrations.RunPython(
+            mark_reviewed_titles, migrations.RunPython.noop
+        ),
+    ]
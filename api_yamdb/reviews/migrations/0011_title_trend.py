@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-18 18:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_similar_titles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleTrend',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='reviews.title')),
+                ('score', models.FloatField(verbose_name='Популярность')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.category')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='titletrend',
+            index=models.Index(fields=['-score', 'title'], name='trend_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titletrend',
+            index=models.Index(fields=['category', '-score', 'title'], name='trend_category_score_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 19:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_title_year_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleSearch',
+            fields=[
+                ('title', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='reviews.title')),
+                ('name', models.TextField()),
+                ('description', models.TextField()),
+                ('document', reviews.search.SearchDocumentField(db_column='reviews_title_fts')),
+            ],
+            options={
+                'db_table': 'reviews_title_fts',
+                'managed': False,
+            },
+        ),
+    ]
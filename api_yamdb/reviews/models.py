@@ -1,9 +1,11 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.core.validators import (MaxValueValidator,
                                     MinValueValidator,
                                     RegexValidator)
 
+from reviews.search import FTS_TABLE, SearchDocumentField
 from reviews.validators import validate_year
 
 username_validator = RegexValidator(r"^[\w.@+-]+")
@@ -26,6 +28,33 @@ class User(AbstractUser):
     last_name = models.CharField(max_length=150, blank=True)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=USER)
     bio = models.TextField(blank=True)
+    role_version = models.PositiveIntegerField(default=0, editable=False)
+
+    ACCESS_FIELDS = ('role', 'is_staff', 'is_superuser', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_access = instance.access_state()
+        return instance
+
+    def access_state(self):
+        return tuple(self.__dict__.get(name) for name in self.ACCESS_FIELDS)
+
+    def save(self, *args, **kwargs):
+        # Смена роли или флагов доступа отзывает ранее выданные токены.
+        loaded_access = getattr(self, '_loaded_access', None)
+        if (
+            loaded_access is not None
+            and loaded_access != self.access_state()
+            and not self.get_deferred_fields() & set(self.ACCESS_FIELDS)
+        ):
+            self.role_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'role_version'}
+        super().save(*args, **kwargs)
+        self._loaded_access = self.access_state()
 
     @property
     def is_moderator(self):
@@ -39,6 +68,17 @@ class User(AbstractUser):
 class Category(models.Model):
     name = models.CharField(max_length=256)
     slug = models.SlugField(max_length=50, unique=True)
+    rating_prior_mean = models.FloatField(
+        verbose_name='Априорная средняя оценка',
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(10)],
+    )
+    rating_prior_weight = models.PositiveIntegerField(
+        verbose_name='Вес априорной оценки',
+        null=True,
+        blank=True,
+    )
 
     def __str__(self):
         return self.slug
@@ -57,6 +97,7 @@ class Title(models.Model):
     year = models.IntegerField(
         verbose_name='Год релиза',
         validators=(validate_year,),
+        db_index=True,
     )
     description = models.TextField(null=True, verbose_name='Описание')
     genre = models.ManyToManyField(
@@ -70,10 +111,66 @@ class Title(models.Model):
         verbose_name='Категория',
         related_name='titles'
     )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    weighted_rating = models.FloatField(
+        verbose_name='Взвешенный рейтинг',
+        null=True,
+        editable=False,
+        db_index=True,
+    )
+    similar_stale = models.BooleanField(
+        verbose_name='Похожие произведения устарели',
+        default=False,
+        editable=False,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(similar_stale=True),
+                name='title_similar_stale_idx'
+            )
+        ]
 
     def __str__(self) -> str:
         return self.name
 
+    @property
+    def rating(self):
+        if not self.review_count:
+            return None
+        return self.score_sum / self.review_count
+
+
+class TitleSearch(models.Model):
+    # Полнотекстовый индекс FTS5 из миграции 0004: таблицу ведёт
+    # reviews.search, модель нужна только для соединения в запросах.
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_document'
+    )
+    name = models.TextField()
+    description = models.TextField()
+    document = SearchDocumentField(db_column=FTS_TABLE)
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
 
 class Review(models.Model):
     title = models.ForeignKey(
@@ -103,6 +200,25 @@ class Review(models.Model):
             models.UniqueConstraint(
                 fields=['author', 'title'], name="unique_review")
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            )
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Оценка на момент загрузки нужна, чтобы при сохранении
+        # скорректировать агрегаты произведения на разницу.
+        instance._loaded_score = instance.__dict__.get('score')
+        instance._loaded_title_id = instance.__dict__.get('title_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -119,5 +235,169 @@ class Comment(models.Model):
     pub_date = models.DateTimeField(auto_now_add=True)
     text = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            )
+        ]
+
     def __str__(self):
         return self.author
+
+
+class TitleRanking(models.Model):
+    # Строка без жанра участвует в общем рейтинге, строки с жанром -
+    # в рейтингах жанров; поля произведения продублированы, чтобы
+    # выборка лучших шла по индексу без соединений.
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings'
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    year = models.IntegerField(verbose_name='Год релиза')
+    rating = models.FloatField(verbose_name='Рейтинг')
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'genre'], name='unique_title_genre_ranking'
+            ),
+            models.UniqueConstraint(
+                fields=['title'],
+                condition=models.Q(genre__isnull=True),
+                name='unique_title_ranking'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['genre', '-rating', '-review_count', 'title'],
+                name='ranking_genre_idx'
+            ),
+            models.Index(
+                fields=['category', 'genre', '-rating', '-review_count',
+                        'title'],
+                name='ranking_category_genre_idx'
+            ),
+        ]
+
+
+class SimilarTitle(models.Model):
+    # Соседи произведения по оценкам пользователей; считаются командой
+    # rebuild_similar_titles.
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='similar'
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+    common = models.PositiveIntegerField(
+        verbose_name='Общих пользователей'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'similar'], name='unique_similar_title'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['title', '-score', 'similar'],
+                name='similar_title_score_idx'
+            )
+        ]
+
+
+class TitleTrend(models.Model):
+    # score - логарифм по основанию 2 суммы весов событий, каждый из
+    # которых умножен на 2 ** (возраст события от общей эпохи в
+    # периодах полураспада); сортировка по нему равна сортировке по
+    # затухающему счётчику на любой момент времени.
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trend'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField(verbose_name='Популярность')
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата обновления'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-score', 'title'], name='trend_score_idx'
+            ),
+            models.Index(
+                fields=['category', '-score', 'title'],
+                name='trend_category_score_idx'
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField(max_length=256, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст письма')
+    from_email = models.EmailField(max_length=254, verbose_name='Отправитель')
+    recipient = models.EmailField(max_length=254, verbose_name='Получатель')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки в очередь'
+    )
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить не раньше'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Количество попыток'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата отправки'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'send_after'],
+                name='outgoing_email_pending_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
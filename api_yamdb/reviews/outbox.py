@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+def enqueue_email(subject, body, recipient):
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=settings.EMAIL,
+        recipient=recipient,
+    )
+    if settings.EMAIL_OUTBOX_EAGER:
+        transaction.on_commit(lambda: deliver_pending(ids=[email.pk]))
+    return email
+
+
+def claim_pending(batch_size, max_attempts, lease, ids=None):
+    # Отмеченные письма откладываются на время аренды, чтобы
+    # параллельный обработчик их не взял.
+    now = timezone.now()
+    with transaction.atomic():
+        pending = OutgoingEmail.objects.filter(
+            sent_at__isnull=True,
+            send_after__lte=now,
+            attempts__lt=max_attempts,
+        )
+        if ids is not None:
+            pending = pending.filter(pk__in=ids)
+        emails = list(pending[:batch_size])
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(send_after=now + lease)
+    return emails
+
+
+def postpone(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.send_after = timezone.now() + timedelta(
+        seconds=settings.EMAIL_OUTBOX_BACKOFF * 2 ** (email.attempts - 1)
+    )
+    email.save(update_fields=('attempts', 'last_error', 'send_after'))
+
+
+def deliver_pending(batch_size=100, ids=None):
+    emails = claim_pending(
+        batch_size,
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        timedelta(seconds=settings.EMAIL_OUTBOX_LEASE),
+        ids,
+    )
+    if not emails:
+        return 0, 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        # Почтовый сервер недоступен: захваченные письма откладываются
+        # так же, как при ошибке отправки, а не ждут конца аренды.
+        for email in emails:
+            postpone(email, error)
+        return 0, len(emails)
+    sent = failed = 0
+    with connection:
+        for email in emails:
+            try:
+                EmailMessage(
+                    email.subject, email.body, email.from_email,
+                    [email.recipient], connection=connection
+                ).send()
+            except Exception as error:
+                postpone(email, error)
+                failed += 1
+            else:
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.save(update_fields=('attempts', 'sent_at'))
+                sent += 1
+    return sent, failed
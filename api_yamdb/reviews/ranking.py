@@ -0,0 +1,112 @@
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from reviews.models import Title, TitleRanking
+
+_state = threading.local()
+
+
+def deleting_titles():
+    if not hasattr(_state, 'deleting'):
+        _state.deleting = set()
+    return _state.deleting
+
+
+def ranking_rows(title, genre_ids):
+    rating = title['score_sum'] / title['review_count']
+    return [
+        TitleRanking(
+            title_id=title['id'],
+            genre_id=genre_id,
+            category_id=title['category_id'],
+            year=title['year'],
+            rating=rating,
+            review_count=title['review_count'],
+        )
+        for genre_id in (None, *genre_ids)
+    ]
+
+
+def min_reviews():
+    return max(settings.TOP_TITLES_MIN_REVIEWS, 1)
+
+
+def is_ranked(title):
+    return title['review_count'] >= min_reviews()
+
+
+def refresh_title_ranking(title_id, genres_changed=False):
+    # Удаляемое каскадом произведение не переоцениваем: его строки
+    # удалятся вместе с ним.
+    if title_id in deleting_titles():
+        return
+    title = Title.objects.filter(pk=title_id).values(
+        'id', 'score_sum', 'review_count', 'category_id', 'year'
+    ).first()
+    rankings = TitleRanking.objects.filter(title_id=title_id)
+    if title is None or not is_ranked(title):
+        rankings.delete()
+        return
+    genre_ids = Title.genre.through.objects.filter(
+        title_id=title_id
+    ).values_list('genre_id', flat=True)
+    if genres_changed:
+        with transaction.atomic():
+            rankings.delete()
+            TitleRanking.objects.bulk_create(ranking_rows(title, genre_ids))
+    elif not rankings.update(
+        category_id=title['category_id'],
+        year=title['year'],
+        rating=title['score_sum'] / title['review_count'],
+        review_count=title['review_count'],
+    ):
+        # Произведение только что набрало нужное число отзывов.
+        TitleRanking.objects.bulk_create(ranking_rows(title, genre_ids))
+
+
+def rebuild_ranking(chunk_size=1000):
+    GenreTitle = Title.genre.through
+    created = 0
+    with transaction.atomic():
+        TitleRanking.objects.all().delete()
+        titles = Title.objects.filter(
+            review_count__gte=min_reviews()
+        ).order_by('pk').values(
+            'id', 'score_sum', 'review_count', 'category_id', 'year'
+        )
+        last_id = 0
+        while True:
+            chunk = list(titles.filter(pk__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            genres = {}
+            for title_id, genre_id in GenreTitle.objects.filter(
+                title_id__in=[title['id'] for title in chunk]
+            ).values_list('title_id', 'genre_id'):
+                genres.setdefault(title_id, []).append(genre_id)
+            rows = []
+            for title in chunk:
+                rows.extend(ranking_rows(title, genres.get(title['id'], ())))
+            TitleRanking.objects.bulk_create(rows)
+            created += len(chunk)
+            last_id = chunk[-1]['id']
+    return created
+
+
+def top_title_ids(category_id=None, genre_id=None, year_min=None,
+                  year_max=None, min_reviews=None, limit=10):
+    rankings = TitleRanking.objects.filter(genre_id=genre_id)
+    if category_id is not None:
+        rankings = rankings.filter(category_id=category_id)
+    if year_min is not None:
+        rankings = rankings.filter(year__gte=year_min)
+    if year_max is not None:
+        rankings = rankings.filter(year__lte=year_max)
+    if min_reviews is not None:
+        rankings = rankings.filter(review_count__gte=min_reviews)
+    return list(
+        rankings.order_by('-rating', '-review_count', 'title_id')
+        .values_list('title_id', flat=True)[:limit]
+    )
@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.db.models import (Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Subquery, Sum, Value)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from reviews.models import Category, Review, Title
+
+
+def weighted_rating(score_sum=F('score_sum'),
+                    review_count=F('review_count')):
+    # Байесовская оценка: к отзывам добавляется prior_weight воображаемых
+    # отзывов с оценкой prior_mean; значения берутся из категории,
+    # а при их отсутствии - из настроек. Без отзывов рейтинга нет.
+    category = Category.objects.filter(pk=OuterRef('category_id'))
+    prior_mean = Coalesce(
+        Subquery(category.values('rating_prior_mean')),
+        Value(float(settings.WEIGHTED_RATING_PRIOR_MEAN)),
+        output_field=FloatField(),
+    )
+    prior_weight = Coalesce(
+        Subquery(category.values('rating_prior_weight')),
+        Value(float(settings.WEIGHTED_RATING_PRIOR_WEIGHT)),
+        output_field=FloatField(),
+    )
+    return ExpressionWrapper(
+        (prior_mean * prior_weight + Cast(score_sum, FloatField()))
+        / (prior_weight + NullIf(
+            Cast(review_count, FloatField()), Value(0.0)
+        )),
+        output_field=FloatField(),
+    )
+
+
+def apply_review_delta(title_id, score_delta, count_delta):
+    Title.objects.filter(pk=title_id).update(
+        score_sum=F('score_sum') + score_delta,
+        review_count=F('review_count') + count_delta,
+        weighted_rating=weighted_rating(
+            F('score_sum') + score_delta, F('review_count') + count_delta
+        ),
+        similar_stale=True,
+    )
+
+
+def recount_title(title_id):
+    aggregates = Review.objects.filter(title_id=title_id).aggregate(
+        total=Sum('score'), count=Count('id')
+    )
+    score_sum = aggregates['total'] or 0
+    Title.objects.filter(pk=title_id).update(
+        score_sum=score_sum,
+        review_count=aggregates['count'],
+        weighted_rating=weighted_rating(
+            Value(score_sum), Value(aggregates['count'])
+        ),
+        similar_stale=True,
+    )
+
+
+def update_weighted_ratings(titles=None):
+    # Один UPDATE пересчитывает все строки прямо в базе, без выгрузки
+    # сумм и количеств в Python.
+    if titles is None:
+        titles = Title.objects.all()
+    return titles.update(weighted_rating=weighted_rating())
+
+
+def iter_title_chunks(chunk_size):
+    last_id = 0
+    while True:
+        chunk = list(
+            Title.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .only('pk', 'score_sum', 'review_count')[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].pk
+
+
+def actual_aggregates(title_ids):
+    rows = (
+        Review.objects.filter(title_id__in=title_ids)
+        .order_by()
+        .values('title_id')
+        .annotate(total=Sum('score'), count=Count('id'))
+    )
+    return {row['title_id']: (row['total'], row['count']) for row in rows}
+
+
+def find_rating_drift(chunk_size=1000):
+    for chunk in iter_title_chunks(chunk_size):
+        actual = actual_aggregates([title.pk for title in chunk])
+        for title in chunk:
+            score_sum, review_count = actual.get(title.pk, (0, 0))
+            if (title.score_sum, title.review_count) != (
+                score_sum, review_count
+            ):
+                yield title, score_sum, review_count
+
+
+def rebuild_ratings(chunk_size=1000):
+    updated = 0
+    for chunk in iter_title_chunks(chunk_size):
+        actual = actual_aggregates([title.pk for title in chunk])
+        changed = []
+        for title in chunk:
+            score_sum, review_count = actual.get(title.pk, (0, 0))
+            if (title.score_sum, title.review_count) != (
+                score_sum, review_count
+            ):
+                title.score_sum = score_sum
+                title.review_count = review_count
+                changed.append(title)
+        Title.objects.bulk_update(changed, ('score_sum', 'review_count'))
+        if changed:
+            update_weighted_ratings(
+                Title.objects.filter(pk__in=[title.pk for title in changed])
+            )
+        updated += len(changed)
+    return updated
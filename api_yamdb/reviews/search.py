@@ -0,0 +1,151 @@
+import re
+
+from django.db import connection, models, transaction
+from django.db.models import F, FloatField, Func, Lookup, Q
+
+FTS_TABLE = 'reviews_title_fts'
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+CYRILLIC_RE = re.compile(r'[а-я]')
+MIN_STEM_LENGTH = 3
+# Окончания упорядочены от длинных к коротким: отсекаем самое длинное,
+# после которого от слова остаётся не меньше MIN_STEM_LENGTH букв.
+RUSSIAN_ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ыми', 'ими', 'его', 'ого', 'ему', 'ому',
+    'иях', 'ях', 'ах', 'ых', 'их', 'ией', 'ей', 'ой', 'ий', 'ый', 'ая',
+    'яя', 'ое', 'ее', 'ые', 'ие', 'ую', 'юю', 'ов', 'ев', 'ом', 'ем',
+    'ам', 'ям', 'ию', 'ия', 'ье', 'ья', 'а', 'я', 'о', 'е', 'ы', 'и',
+    'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+
+INSERT_SQL = (
+    f'INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)'
+)
+DELETE_SQL = f'DELETE FROM {FTS_TABLE} WHERE rowid = %s'
+
+_fts_available = False
+
+
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class SearchDocumentField(models.TextField):
+    # Скрытый столбец FTS5 с именем таблицы: по нему выполняется MATCH
+    # и его же принимают функции ранжирования вроде bm25().
+    pass
+
+
+SearchDocumentField.register_lookup(Match)
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not CYRILLIC_RE.search(word):
+        return word
+    for ending in RUSSIAN_ENDINGS:
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) >= MIN_STEM_LENGTH
+        ):
+            return word[:-len(ending)]
+    return word
+
+
+def stems(text):
+    return [stem(word) for word in WORD_RE.findall(text or '')]
+
+
+def normalize(text):
+    return ' '.join(stems(text))
+
+
+def match_expression(query):
+    return ' '.join(
+        '"{}"*'.format(term.replace('"', '""')) for term in stems(query)
+    )
+
+
+def create_index(cursor):
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+        'USING fts5(name, description)'
+    )
+
+
+def fts_available():
+    # Кэшируем только положительный ответ: таблица может появиться
+    # после миграции в уже запущенном процессе.
+    global _fts_available
+    if not _fts_available:
+        _fts_available = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available
+
+
+def index_title(title, created=False):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        if not created:
+            cursor.execute(DELETE_SQL, [title.pk])
+        cursor.execute(
+            INSERT_SQL,
+            [title.pk, normalize(title.name), normalize(title.description)]
+        )
+
+
+def remove_title(title_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(DELETE_SQL, [title_id])
+
+
+def rebuild_index(titles, batch_size=5000):
+    if not fts_available():
+        return
+    rows = (
+        (pk, normalize(name), normalize(description))
+        for pk, name, description in titles.values_list(
+            'pk', 'name', 'description'
+        ).iterator(chunk_size=batch_size)
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                cursor.executemany(INSERT_SQL, batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERT_SQL, batch)
+
+
+def search_titles(queryset, query):
+    expression = match_expression(query)
+    if not expression:
+        return queryset
+    if fts_available():
+        # Индекс присоединяется через ORM, а не extra(): в подзапросах
+        # (например, в фасетах) Django сам переименует таблицы.
+        return queryset.filter(
+            search_document__document__match=expression
+        ).annotate(search_rank=Func(
+            F('search_document__document'), function='bm25',
+            output_field=FloatField()
+        )).order_by('search_rank', 'pk')
+    # LIKE в SQLite не различает регистр только для ASCII, а iregex
+    # выполняется через re и корректно работает с кириллицей.
+    condition = Q()
+    for term in stems(query):
+        pattern = re.escape(term)
+        condition &= Q(name__iregex=pattern) | Q(description__iregex=pattern)
+    return queryset.filter(condition)
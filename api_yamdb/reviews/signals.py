@@ -0,0 +1,117 @@
+from django.core.signals import request_finished
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Review, Title
+from reviews.ranking import deleting_titles, refresh_title_ranking
+from reviews.ratings import (apply_review_delta, recount_title,
+                             update_weighted_ratings)
+from reviews.search import index_title, remove_title
+from reviews.trending import flush_if_due, record_event
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False,
+                          update_fields=None, **kwargs):
+    if raw:
+        return
+    old_title_id = getattr(instance, '_loaded_title_id', None)
+    if created:
+        apply_review_delta(instance.title_id, instance.score, 1)
+    elif update_fields is None or {'score', 'title'} & set(update_fields):
+        old_score = getattr(instance, '_loaded_score', None)
+        old_title_id = getattr(instance, '_loaded_title_id', None)
+        if old_score is None or old_title_id is None:
+            recount_title(instance.title_id)
+        elif old_title_id != instance.title_id:
+            apply_review_delta(old_title_id, -old_score, -1)
+            apply_review_delta(instance.title_id, instance.score, 1)
+        elif old_score != instance.score:
+            apply_review_delta(
+                instance.title_id, instance.score - old_score, 0
+            )
+    instance._loaded_score = instance.score
+    instance._loaded_title_id = instance.title_id
+    refresh_title_ranking(instance.title_id)
+    if old_title_id is not None and old_title_id != instance.title_id:
+        refresh_title_ranking(old_title_id)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    apply_review_delta(instance.title_id, -instance.score, -1)
+    refresh_title_ranking(instance.title_id)
+
+
+@receiver(post_save, sender=Title)
+def update_search_index_on_save(sender, instance, created, raw=False,
+                                **kwargs):
+    if not raw:
+        index_title(instance, created)
+
+
+@receiver(post_save, sender=Title)
+def update_ranking_on_title_save(sender, instance, created, raw=False,
+                                 **kwargs):
+    if not raw and not (created and instance.review_count == 0):
+        refresh_title_ranking(instance.pk)
+
+
+@receiver(post_save, sender=Title)
+def update_weighted_rating_on_title_save(sender, instance, created,
+                                         raw=False, **kwargs):
+    # Смена категории меняет априорную оценку произведения.
+    if not raw and not created and instance.review_count:
+        update_weighted_ratings(Title.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Category)
+def update_weighted_rating_on_category_save(sender, instance, created,
+                                            raw=False, **kwargs):
+    if not raw and not created:
+        update_weighted_ratings(
+            Title.objects.filter(category=instance, review_count__gt=0)
+        )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_ranking_on_genres(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # У произведения без отзывов строк рейтинга нет.
+        if instance.review_count:
+            refresh_title_ranking(instance.pk, genres_changed=True)
+    elif pk_set:
+        for title_id in pk_set:
+            refresh_title_ranking(title_id, genres_changed=True)
+
+
+@receiver(pre_delete, sender=Title)
+def mark_title_deleting(sender, instance, **kwargs):
+    deleting_titles().add(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def update_search_index_on_delete(sender, instance, **kwargs):
+    deleting_titles().discard(instance.pk)
+    remove_title(instance.pk)
+
+
+@receiver(post_save, sender=Review)
+def count_review_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_event('review', instance.title_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_event('comment', instance.review.title_id)
+
+
+# Накопленные в процессе счётчики сохраняются после отправки ответа,
+# не занимая время и бюджет запросов самого запроса.
+request_finished.connect(flush_if_due)
@@ -0,0 +1,172 @@
+import heapq
+import math
+from contextlib import contextmanager
+from itertools import groupby
+
+from django.db import connection, transaction
+
+from reviews.models import Review, SimilarTitle, Title
+
+SHIFT_TABLE = 'similarity_user_shift'
+VECTOR_TABLE = 'similarity_vector'
+NORM_TABLE = 'similarity_title_norm'
+METHODS = ('adjusted', 'cosine')
+
+
+@contextmanager
+def scratch_tables(method, max_user_reviews=0):
+    # Смещённые оценки и нормы векторов произведений считаются в базе
+    # один раз за запуск; в памяти процесса остаются только строки
+    # текущей пачки. Таблица оценок без rowid хранит данные прямо
+    # в индексе (author, title), и пары читаются без обращений к отзывам.
+    review = Review._meta.db_table
+    shift = 'AVG(score)' if method == 'adjusted' else '0.0'
+    having, params = '', []
+    if max_user_reviews:
+        having, params = 'HAVING COUNT(*) <= %s', [max_user_reviews]
+    drop_scratch_tables()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE {SHIFT_TABLE} AS '
+            f'SELECT author_id, {shift} AS shift FROM {review} '
+            f'GROUP BY author_id {having}',
+            params
+        )
+        cursor.execute(
+            f'CREATE UNIQUE INDEX {SHIFT_TABLE}_idx '
+            f'ON {SHIFT_TABLE} (author_id)'
+        )
+        cursor.execute(
+            f'CREATE TEMP TABLE {VECTOR_TABLE} ('
+            'author_id integer, title_id integer, value real, '
+            'PRIMARY KEY (author_id, title_id)) WITHOUT ROWID'
+        )
+        cursor.execute(
+            f'INSERT INTO {VECTOR_TABLE} '
+            'SELECT r.author_id, r.title_id, r.score - s.shift '
+            f'FROM {review} r '
+            f'JOIN {SHIFT_TABLE} s ON s.author_id = r.author_id '
+            'ORDER BY r.author_id, r.title_id'
+        )
+        cursor.execute(
+            f'CREATE TEMP TABLE {NORM_TABLE} AS '
+            'SELECT title_id, SUM(value * value) AS norm '
+            f'FROM {VECTOR_TABLE} GROUP BY title_id'
+        )
+        cursor.execute(
+            f'CREATE UNIQUE INDEX {NORM_TABLE}_idx ON {NORM_TABLE} (title_id)'
+        )
+    try:
+        yield
+    finally:
+        drop_scratch_tables()
+
+
+def drop_scratch_tables():
+    with connection.cursor() as cursor:
+        for table in (SHIFT_TABLE, VECTOR_TABLE, NORM_TABLE):
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+def pairs_sql(count):
+    # Скалярные произведения пачки произведений со всеми остальными:
+    # пары собираются через общих авторов.
+    review = Review._meta.db_table
+    placeholders = ', '.join(['%s'] * count)
+    return (
+        'SELECT p.title_id, p.similar_id, p.dot, p.common, '
+        'n1.norm, n2.norm FROM ('
+        'SELECT r.title_id, b.title_id AS similar_id, '
+        'SUM(a.value * b.value) AS dot, COUNT(*) AS common '
+        f'FROM {review} r '
+        f'JOIN {VECTOR_TABLE} a ON a.author_id = r.author_id '
+        'AND a.title_id = r.title_id '
+        f'JOIN {VECTOR_TABLE} b ON b.author_id = r.author_id '
+        'AND b.title_id <> r.title_id '
+        f'WHERE r.title_id IN ({placeholders}) '
+        'GROUP BY r.title_id, b.title_id '
+        'HAVING COUNT(*) >= %s'
+        ') p '
+        f'JOIN {NORM_TABLE} n1 ON n1.title_id = p.title_id '
+        f'JOIN {NORM_TABLE} n2 ON n2.title_id = p.similar_id '
+        'ORDER BY p.title_id'
+    )
+
+
+def iter_pairs(title_ids, min_common, fetch_size=2000):
+    with connection.cursor() as cursor:
+        cursor.execute(pairs_sql(len(title_ids)), [*title_ids, min_common])
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                return
+            yield from rows
+
+
+def neighbours(pairs, count):
+    # Для каждого произведения оставляем count соседей с наибольшим
+    # положительным сходством.
+    for title_id, rows in groupby(pairs, key=lambda row: row[0]):
+        candidates = []
+        for _, similar_id, dot, common, norm, similar_norm in rows:
+            if dot <= 0 or not norm or not similar_norm:
+                continue
+            candidates.append(
+                (dot / math.sqrt(norm * similar_norm), -similar_id, common)
+            )
+        for score, similar_id, common in heapq.nlargest(count, candidates):
+            yield SimilarTitle(
+                title_id=title_id, similar_id=-similar_id,
+                score=score, common=common
+            )
+
+
+def refresh_chunk(title_ids, count, min_common):
+    # Флаг снимается до расчёта: отзыв, пришедший во время расчёта,
+    # снова пометит произведение.
+    Title.objects.filter(pk__in=title_ids).update(similar_stale=False)
+    rows = list(neighbours(iter_pairs(title_ids, min_common), count))
+    with transaction.atomic():
+        SimilarTitle.objects.filter(title_id__in=title_ids).delete()
+        SimilarTitle.objects.bulk_create(rows)
+    return len(rows)
+
+
+def title_id_chunks(titles, chunk_size):
+    last_id = 0
+    while True:
+        chunk = list(
+            titles.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+def rebuild_similar_titles(count, min_common=2, method='adjusted',
+                           max_user_reviews=0, chunk_size=100, stale=False):
+    if stale:
+        titles = Title.objects.filter(similar_stale=True)
+    else:
+        titles = Title.objects.filter(review_count__gt=0)
+    processed = 0
+    with scratch_tables(method, max_user_reviews):
+        for chunk in title_id_chunks(titles, chunk_size):
+            refresh_chunk(chunk, count, min_common)
+            processed += len(chunk)
+    if not stale:
+        SimilarTitle.objects.filter(title__review_count=0).delete()
+        Title.objects.filter(
+            similar_stale=True, review_count=0
+        ).update(similar_stale=False)
+    return processed
+
+
+def similar_title_ids(title_id, limit):
+    return list(
+        SimilarTitle.objects.filter(title_id=title_id)
+        .order_by('-score', 'similar_id')
+        .values_list('similar_id', flat=True)[:limit]
+    )
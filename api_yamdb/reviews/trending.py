@@ -0,0 +1,124 @@
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import Title, TitleTrend
+
+logger = logging.getLogger('reviews.trending')
+
+# Общая для всех процессов точка отсчёта: вклады, посчитанные от неё,
+# складываются без приведения ко времени друг друга.
+EPOCH = 1577836800
+# Ключи вне диапазона INTEGER SQLite ломают весь запрос сохранения.
+MAX_TITLE_ID = 2 ** 63 - 1
+
+_lock = threading.Lock()
+_pending = {}
+_last_flush = time.monotonic()
+
+
+def log_add(first, second):
+    # log2(2 ** first + 2 ** second) без переполнения.
+    if first is None:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def event_score(weight, timestamp=None):
+    if timestamp is None:
+        timestamp = time.time()
+    return math.log2(weight) + (
+        (timestamp - EPOCH) / settings.TRENDING_HALF_LIFE
+    )
+
+
+def decayed_value(score, timestamp=None):
+    if timestamp is None:
+        timestamp = time.time()
+    return 2 ** (score - (timestamp - EPOCH) / settings.TRENDING_HALF_LIFE)
+
+
+def record_event(event, title_id, timestamp=None):
+    score = event_score(settings.TRENDING_WEIGHTS[event], timestamp)
+    with _lock:
+        _pending[title_id] = log_add(_pending.get(title_id), score)
+
+
+def take_pending():
+    global _pending, _last_flush
+    with _lock:
+        pending, _pending = _pending, {}
+        _last_flush = time.monotonic()
+    return pending
+
+
+def restore_pending(pending):
+    with _lock:
+        for title_id, score in pending.items():
+            _pending[title_id] = log_add(_pending.get(title_id), score)
+
+
+def merge_scores(pending):
+    # Писатели в SQLite идут по одному, поэтому чтение и запись счётчиков
+    # в одной транзакции не теряют вклады других процессов.
+    pending = {
+        title_id: score for title_id, score in pending.items()
+        if 0 < title_id <= MAX_TITLE_ID
+    }
+    with transaction.atomic():
+        categories = dict(
+            Title.objects.filter(pk__in=pending)
+            .values_list('pk', 'category_id')
+        )
+        trends = TitleTrend.objects.in_bulk(list(categories))
+        now = timezone.now()
+        created = []
+        for title_id, category_id in categories.items():
+            trend = trends.get(title_id)
+            if trend is None:
+                created.append(TitleTrend(
+                    title_id=title_id, category_id=category_id,
+                    score=pending[title_id]
+                ))
+                continue
+            trend.category_id = category_id
+            trend.score = log_add(trend.score, pending[title_id])
+            trend.updated = now
+        TitleTrend.objects.bulk_update(
+            trends.values(), ('category', 'score', 'updated')
+        )
+        TitleTrend.objects.bulk_create(created)
+    return len(categories)
+
+
+def flush():
+    pending = take_pending()
+    if not pending:
+        return 0
+    try:
+        return merge_scores(pending)
+    except Exception:
+        logger.exception('Не удалось сохранить счётчики популярности')
+        restore_pending(pending)
+        return 0
+
+
+def flush_if_due(**kwargs):
+    if time.monotonic() - _last_flush >= settings.TRENDING_FLUSH_INTERVAL:
+        flush()
+
+
+def trending_title_ids(category_id=None, limit=10):
+    trends = TitleTrend.objects.all()
+    if category_id is not None:
+        trends = trends.filter(category_id=category_id)
+    return list(
+        trends.order_by('-score', 'title_id')
+        .values_list('title_id', flat=True)[:limit]
+    )
@@ -0,0 +1,17 @@
+import pytest
+from django.core.cache import cache
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yamdb-tests',
+    }
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    settings.CACHES = LOCMEM_CACHES
+    cache.clear()
+    yield
+    cache.clear()
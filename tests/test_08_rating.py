@@ -0,0 +1,64 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAggregates:
+
+    def test_01_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[1]["id"]}/'
+
+        response = user_client.patch(review_url, data={'score': 9})
+        assert response.status_code == HTTPStatus.OK
+        assert admin_client.get(title_url).json()['rating'] == 7, (
+            'Проверьте, что рейтинг произведения пересчитывается '
+            'при изменении оценки в отзыве.'
+        )
+
+        response = user_client.delete(review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert admin_client.get(title_url).json()['rating'] == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается '
+            'при удалении отзыва.'
+        )
+
+        response = admin_client.delete(
+            f'{title_url}reviews/{reviews[0]["id"]}/'
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert admin_client.get(title_url).json()['rating'] is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен `None`.'
+        )
+
+    def test_02_rebuild_ratings_command(self, admin_client, admin,
+                                        user_client, user):
+        from reviews.models import Title
+
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.filter(pk=titles[0]['id']).update(
+            score_sum=0, review_count=0
+        )
+
+        out = StringIO()
+        call_command('rebuild_ratings', '--check', stdout=out)
+        assert 'Расхождений найдено: 1' in out.getvalue(), (
+            'Проверьте, что команда `rebuild_ratings --check` сообщает о '
+            'расхождениях в агрегатах рейтинга.'
+        )
+
+        call_command('rebuild_ratings', '--chunk-size', '1', stdout=out)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (10, 2)
+        out = StringIO()
+        call_command('rebuild_ratings', '--check', stdout=out)
+        assert 'Расхождений нет' in out.getvalue()
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+
+from tests.utils import create_reviews
+
+FILE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': None,
+    }
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09ResponseCache:
+
+    def check_invalidation(self, admin_client, author_map):
+        from api.cache import cache_stats
+
+        url = '/api/v1/categories/'
+        response = admin_client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        response = admin_client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{url}` '
+            'обслуживается из кэша.'
+        )
+        assert cache_stats() == {'hits': 1, 'misses': 1}
+
+        admin_client.post(url, data={'name': 'Музыка', 'slug': 'music'})
+        response = admin_client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что создание категории сбрасывает кэш '
+            f'ответов `{url}`.'
+        )
+        assert response.json()['count'] == 1
+
+        _, titles = create_reviews(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert admin_client.get(title_url).json()['rating'] == 5
+        assert admin_client.get(title_url)['X-Cache'] == 'HIT'
+        user, user_client = list(author_map.items())[-1]
+        review_id = user_client.get(
+            f'{title_url}reviews/'
+        ).json()['results'][0]['id']
+        response = user_client.patch(
+            f'{title_url}reviews/{review_id}/', data={'score': 9}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert admin_client.get(title_url).json()['rating'] == 7, (
+            'Проверьте, что изменение отзыва сбрасывает кэш ответов '
+            'о произведении.'
+        )
+
+    def test_01_locmem_cache(self, admin_client, admin, user_client, user):
+        self.check_invalidation(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+
+    def test_02_file_based_cache(self, tmp_path, admin_client, admin,
+                                 user_client, user):
+        FILE_CACHES['default']['LOCATION'] = str(tmp_path)
+        with override_settings(CACHES=FILE_CACHES):
+            assert 'FileBasedCache' in type(caches['default']).__name__
+            self.check_invalidation(
+                admin_client, {admin: admin_client, user: user_client}
+            )
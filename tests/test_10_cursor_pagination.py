@@ -0,0 +1,48 @@
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    def collect_pages(self, client, url):
+        ids = []
+        while url:
+            data = client.get(url).json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсорной пагинации ответ '
+                'не содержит ключ `count`.'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids
+
+    def test_01_reviews_and_comments_cursor(self, admin_client, admin,
+                                            user_client, user,
+                                            moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+
+        for url, objects in ((reviews_url, reviews),
+                             (comments_url, comments)):
+            ids = self.collect_pages(
+                admin_client, f'{url}?pagination=cursor&limit=2'
+            )
+            assert ids == sorted(ids, reverse=True), (
+                f'Проверьте, что курсорная пагинация `{url}` упорядочивает '
+                'объекты по дате публикации от новых к старым.'
+            )
+            assert set(ids) == {obj['id'] for obj in objects}
+
+            data = admin_client.get(url).json()
+            assert data['count'] == len(objects), (
+                f'Проверьте, что без параметра `pagination` эндпоинт `{url}` '
+                'использует пагинацию limit/offset.'
+            )
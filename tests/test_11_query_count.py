@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11QueryCount:
+
+    def test_01_list_queries_do_not_grow_with_page(self, admin_client, admin,
+                                                   user_client, user,
+                                                   moderator_client,
+                                                   moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, reviews, titles = create_comments(admin_client, author_map)
+        title_id = titles[0]['id']
+        titles_url = '/api/v1/titles/'
+        assert count_queries(
+            admin_client, f'{titles_url}?year=1984'
+        ) == count_queries(admin_client, titles_url), (
+            'Проверьте, что количество SQL-запросов для '
+            f'`{titles_url}` не зависит от количества произведений.'
+        )
+        urls = (
+            f'/api/v1/titles/{title_id}/reviews/?limit={{}}',
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/'
+            'comments/?limit={}',
+        )
+        for url in urls:
+            single = count_queries(admin_client, url.format(1))
+            full = count_queries(admin_client, url.format(100))
+            assert single == full, (
+                'Проверьте, что количество SQL-запросов для '
+                f'`{url.format("N")}` не зависит от размера страницы.'
+            )
+
+    def test_02_nested_routes_resolve_parents_once(self, admin_client, admin,
+                                                   user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        comments_url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        with CaptureQueriesContext(connection) as context:
+            admin_client.get(comments_url)
+        parent_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_review"' in query['sql']
+            or 'FROM "reviews_title"' in query['sql']
+        ]
+        assert len(parent_queries) == 1, (
+            f'Проверьте, что `{comments_url}` проверяет произведение и '
+            'отзыв одним SQL-запросом.'
+        )
+
+        response = admin_client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что запрос комментариев к отзыву, не относящемуся '
+            'к произведению, возвращает ответ со статусом 404.'
+        )
+        response = admin_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/0/comments/'
+        )
+        assert response.status_code == 404
@@ -0,0 +1,141 @@
+import re
+
+import pytest
+
+from tests.utils import create_comments
+
+SERVER_TIMING = re.compile(r'desc="(\d+) queries"')
+
+
+def queries_spent(response):
+    return int(SERVER_TIMING.search(response['Server-Timing']).group(1))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12QueryBudget:
+
+    def test_01_router_endpoints_within_budget(self, settings, admin_client,
+                                               admin, user_client, user):
+        from api.middleware import get_query_budget
+        from api.urls import router
+
+        settings.QUERY_BUDGET_RAISE = True
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        kwargs = {
+            'title_id': titles[0]['id'],
+            'review_id': reviews[0]['id'],
+        }
+        detail_lookups = {
+            'users': user.username,
+            'titles': titles[0]['id'],
+            'reviews': reviews[0]['id'],
+            'comments': comments[0]['id'],
+        }
+
+        for prefix, viewset, basename in router.registry:
+            list_url = '/api/v1/{}/'.format(
+                re.sub(r'\(\?P<(\w+)>[^)]+\)',
+                       lambda match: str(kwargs[match.group(1)]), prefix)
+            )
+            urls = [(list_url, 'list')]
+            if basename in detail_lookups:
+                urls.append(
+                    (f'{list_url}{detail_lookups[basename]}/', 'retrieve')
+                )
+            for url, action in urls:
+                view = viewset.as_view({'get': action})
+                budget = get_query_budget(view, 'GET')
+                assert budget is not None, (
+                    f'Для `{viewset.__name__}.{action}` не задан '
+                    'бюджет SQL-запросов `query_budget`.'
+                )
+                response = admin_client.get(url)
+                assert response.status_code == 200, url
+                assert queries_spent(response) <= budget, (
+                    f'GET-запрос к `{url}` превышает бюджет SQL-запросов.'
+                )
+
+    def test_02_write_endpoints_within_budget(self, settings, admin_client,
+                                              admin, user_client, user):
+        settings.QUERY_BUDGET_RAISE = True
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        response = user_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={'text': 'Хорошо', 'score': 8}
+        )
+        assert response.status_code == 201
+        response = user_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/',
+            data={'text': 'Согласен'}
+        )
+        assert response.status_code == 201
+
+    def test_03_update_and_delete_within_budget(
+            self, settings, admin_client, admin, user_client, user
+    ):
+        from api import views
+        from api.middleware import get_query_budget
+
+        settings.QUERY_BUDGET_RAISE = True
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        comment_url = f'{review_url}comments/{comments[0]["id"]}/'
+        requests = (
+            (views.UserViewSet, 'post', 'create', '/api/v1/users/',
+             {'username': 'budget', 'email': 'budget@yamdb.fake'}),
+            (views.UserViewSet, 'patch', 'partial_update',
+             '/api/v1/users/budget/', {'first_name': 'Бюджет'}),
+            (views.UserViewSet, 'delete', 'destroy',
+             '/api/v1/users/budget/', None),
+            (views.GenreViewSet, 'post', 'create', '/api/v1/genres/',
+             {'name': 'Драма', 'slug': 'budget'}),
+            (views.GenreViewSet, 'delete', 'destroy',
+             '/api/v1/genres/budget/', None),
+            (views.CategoryViewSet, 'post', 'create', '/api/v1/categories/',
+             {'name': 'Сериал', 'slug': 'budget'}),
+            (views.CategoryViewSet, 'delete', 'destroy',
+             '/api/v1/categories/budget/', None),
+            (views.TitleViewSet, 'patch', 'partial_update', title_url,
+             {'name': 'Терминатор 2', 'genre': ['drama']}),
+            (views.ReviewViewSet, 'patch', 'partial_update', review_url,
+             {'text': 'Передумал', 'score': 3}),
+            (views.CommentViewSet, 'patch', 'partial_update', comment_url,
+             {'text': 'Передумал'}),
+            (views.CommentViewSet, 'delete', 'destroy', comment_url, None),
+            (views.ReviewViewSet, 'delete', 'destroy', review_url, None),
+            (views.TitleViewSet, 'delete', 'destroy', title_url, None),
+            (views.UserViewSet, 'delete', 'destroy',
+             f'/api/v1/users/{user.username}/', None),
+        )
+        for viewset, method, action, url, data in requests:
+            budget = get_query_budget(
+                viewset.as_view({method: action}), method.upper()
+            )
+            assert budget is not None, (
+                f'Для `{viewset.__name__}.{action}` не задан '
+                'бюджет SQL-запросов `query_budget`.'
+            )
+            response = getattr(admin_client, method)(url, data=data)
+            assert response.status_code < 300, url
+            assert queries_spent(response) <= budget, (
+                f'{method.upper()}-запрос к `{url}` превышает бюджет '
+                'SQL-запросов.'
+            )
+
+    def test_04_budget_violation_raises(self, settings, monkeypatch,
+                                        client):
+        from api.middleware import QueryBudgetExceeded
+        from api.views import GenreViewSet
+
+        settings.QUERY_BUDGET_RAISE = True
+        monkeypatch.setattr(GenreViewSet, 'query_budget', 0)
+        with pytest.raises(QueryBudgetExceeded):
+            client.get('/api/v1/genres/')
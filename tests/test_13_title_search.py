@@ -0,0 +1,66 @@
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleSearch:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', {'search': query})
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/',
+            data={'description': 'Лучшие фильмы восьмидесятых'}
+        )
+        assert self.search(client, 'терминатору') == ['Терминатор'], (
+            'Проверьте, что поиск по `/api/v1/titles/?search=` '
+            'учитывает русские окончания.'
+        )
+        assert self.search(client, 'креп') == ['Крепкий орешек'], (
+            'Проверьте, что поиск по `/api/v1/titles/?search=` '
+            'поддерживает поиск по префиксу.'
+        )
+        assert self.search(client, 'фильм') == ['Крепкий орешек'], (
+            'Проверьте, что поиск по `/api/v1/titles/?search=` '
+            'ищет и по описанию произведения.'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert self.search(client, 'терминатор') == []
+
+    def test_02_search_without_fts(self, monkeypatch, client, admin_client):
+        from reviews import search
+
+        create_titles(admin_client)
+        monkeypatch.setattr(search, 'fts_available', lambda: False)
+        assert self.search(client, 'Терминатора') == ['Терминатор'], (
+            'Проверьте, что без FTS5 поиск по `/api/v1/titles/?search=` '
+            'работает через LIKE.'
+        )
+
+    def test_03_search_rank(self, client, admin_client):
+        _, categories, _ = create_titles(admin_client)
+        for name, description in (
+            ('Пикник на обочине', 'Повесть о сталкере и Зоне, '
+                                  'по которой снят фильм'),
+            ('Сталкер', 'Сталкер ведёт в Зону'),
+        ):
+            admin_client.post('/api/v1/titles/', data={
+                'name': name, 'year': 1979, 'description': description,
+                'category': categories[0]['slug'],
+            })
+        assert self.search(client, 'сталкер') == [
+            'Сталкер', 'Пикник на обочине'
+        ], (
+            'Проверьте, что результаты поиска упорядочены по релевантности.'
+        )
+        response = client.get(
+            '/api/v1/titles/', {'search': 'сталкер', 'ordering': 'name'}
+        )
+        assert [title['name'] for title in response.json()['results']] == [
+            'Пикник на обочине', 'Сталкер'
+        ]
@@ -0,0 +1,159 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def client_for(user):
+    from api.authentication import get_token_for_user
+
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(user)}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TokenUser:
+
+    def test_01_token_user_skips_user_query(self, user, admin):
+        client = client_for(user)
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email, (
+            'Проверьте, что `/api/v1/users/me/` возвращает полные данные '
+            'пользователя при аутентификации по токену с claims.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client_for(admin).post(
+                '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not any(
+            'FROM "reviews_user"' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что при аутентификации по токену с claims '
+            'пользователь не загружается из базы данных.'
+        )
+
+    def test_02_role_change_revokes_token(self, admin_client, user):
+        client = client_for(user)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что смена роли пользователя отзывает выданные ему '
+            'токены.'
+        )
+
+        user.refresh_from_db()
+        assert client_for(user).get(
+            '/api/v1/users/me/'
+        ).json()['role'] == 'moderator'
+
+    def test_03_token_endpoint_claims(self, client, user):
+        from django.contrib.auth.tokens import default_token_generator
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.OK
+        token = AccessToken(response.json()['Токен'])
+        assert token['username'] == user.username
+        assert token['role'] == user.role
+        assert token['role_version'] == user.role_version, (
+            'Проверьте, что `/api/v1/auth/token/` выдаёт токен с данными '
+            'пользователя в claims.'
+        )
+
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username, 'confirmation_code': 'invalid',
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_claims_token_keeps_permissions(self, client, admin, user,
+                                              moderator):
+        from django.contrib.auth.tokens import default_token_generator
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from api.authentication import build_token_user
+
+        token_user = build_token_user(AccessToken(
+            client.post('/api/v1/auth/token/', data={
+                'username': user.username,
+                'confirmation_code': default_token_generator.make_token(user),
+            }).json()['Токен']
+        ))
+        for field in ('id', 'username', 'role', 'is_staff', 'is_superuser',
+                      'is_active', 'role_version'):
+            assert getattr(token_user, field) == getattr(user, field), (
+                'Проверьте, что каждое значение из claims попадает в своё '
+                f'поле пользователя: `{field}`.'
+            )
+        assert token_user.email == user.email
+
+        for account in (user, moderator):
+            account_client = client_for(account)
+            assert account_client.post('/api/v1/categories/', data={
+                'name': 'Сериал', 'slug': 'series'
+            }).status_code == HTTPStatus.FORBIDDEN
+            assert account_client.get('/api/v1/users/').status_code == (
+                HTTPStatus.FORBIDDEN
+            )
+            assert account_client.delete(
+                f'/api/v1/users/{admin.username}/'
+            ).status_code == HTTPStatus.FORBIDDEN, (
+                'Проверьте, что токен с claims не даёт пользователю '
+                'прав администратора.'
+            )
+
+        category = client_for(admin).post('/api/v1/categories/', data={
+            'name': 'Фильм', 'slug': 'films'
+        })
+        assert category.status_code == HTTPStatus.CREATED
+        title = client_for(admin).post('/api/v1/titles/', data={
+            'name': 'Сталкер', 'year': 1979, 'category': 'films'
+        })
+        response = client_for(user).post(
+            f'/api/v1/titles/{title.json()["id"]}/reviews/',
+            data={'text': 'Шедевр', 'score': 10}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username, (
+            'Проверьте, что автор отзыва, созданного по токену с claims, '
+            'совпадает с владельцем токена.'
+        )
+
+    def test_05_role_version_cache_expires(self, settings, user):
+        from django.core.cache import cache
+        from django.db.models import F
+
+        from reviews.models import User
+
+        settings.TOKEN_USER_CACHE_TTL = 0
+        cache.clear()
+        client = client_for(user)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+
+        # Роль сменили в другом процессе: его кэш нам не виден.
+        User.objects.filter(pk=user.pk).update(
+            role_version=F('role_version') + 1
+        )
+        assert client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что версия роли в кэше устаревает через '
+            'TOKEN_USER_CACHE_TTL.'
+        )
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Uniqueness:
+    url_signup = '/api/v1/auth/signup/'
+
+    def test_01_signup_is_case_insensitive(self, client, admin_client, user):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url_signup, data={
+                'username': user.username.lower(),
+                'email': 'other@yamdb.fake'
+            })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'username' in response.json(), (
+            f'Проверьте, что `{self.url_signup}` не позволяет занять имя, '
+            'отличающееся от существующего только регистром.'
+        )
+        assert len(context.captured_queries) == 1, (
+            f'Проверьте, что `{self.url_signup}` проверяет занятость имени '
+            'и адреса одним SQL-запросом.'
+        )
+
+        response = client.post(self.url_signup, data={
+            'username': 'other', 'email': user.email.upper()
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'email' in response.json()
+
+        response = client.post(self.url_signup, data={
+            'username': user.username.upper(), 'email': user.email.upper()
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.url_signup}` повторно отправляет код '
+            'существующему пользователю без учёта регистра.'
+        )
+
+        response = admin_client.post('/api/v1/users/', data={
+            'username': user.username.upper(), 'email': 'new@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что нарушение уникальности имени пользователя '
+            'возвращает ответ со статусом 400, а не 500.'
+        )
+
+    def test_02_duplicate_review_relies_on_constraint(self, admin_client,
+                                                      user_client):
+        from tests.utils import create_titles
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.CREATED
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв на произведение возвращает '
+            'ответ со статусом 400.'
+        )
+        assert not any(
+            'EXISTS' in query['sql'] or 'LIMIT 1' in query['sql']
+            for query in context.captured_queries
+            if 'FROM "reviews_review"' in query['sql']
+        ), 'Уникальность отзыва должна обеспечиваться ограничением БД.'
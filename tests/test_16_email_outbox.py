@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+    data = {'username': 'outbox_user', 'email': 'outbox@yamdb.fake'}
+
+    def test_01_signup_enqueues_email(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        outbox_before_count = len(mail.outbox)
+        response = client.post(self.url_signup, data=self.data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что `{self.url_signup}` не отправляет письмо '
+            'во время обработки запроса, а ставит его в очередь.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == self.data['email']
+        assert email.sent_at is None
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert self.data['email'] in mail.outbox[-1].to
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        assert email.attempts == 1
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_failed_email_is_retried_with_backoff(
+            self, client, settings, monkeypatch
+    ):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_BACKOFF = 60
+        client.post(self.url_signup, data=self.data)
+
+        def fail(self, *args, **kwargs):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr('django.core.mail.EmailMessage.send', fail)
+        call_command('send_outbox')
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert 'SMTP' in email.last_error
+        assert email.send_after > timezone.now()
+
+        monkeypatch.undo()
+        outbox_before_count = len(mail.outbox)
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что письмо после ошибки откладывается на время '
+            'экспоненциальной задержки.'
+        )
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        assert email.attempts == 2
+
+    def test_03_unavailable_server_postpones_claimed_emails(
+            self, client, settings, monkeypatch
+    ):
+        settings.EMAIL_OUTBOX_BACKOFF = 60
+
+        def fail(self, *args, **kwargs):
+            raise ConnectionRefusedError('SMTP недоступен')
+
+        monkeypatch.setattr(
+            'django.core.mail.backends.locmem.EmailBackend.open', fail
+        )
+        response = client.post(self.url_signup, data=self.data)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что недоступность почтового сервера не приводит '
+            'к ошибке при регистрации.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert 'SMTP' in email.last_error
+        assert email.send_after > timezone.now()
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        call_command('send_outbox')
+        email.refresh_from_db()
+        assert email.attempts == 2, (
+            'Проверьте, что письма, захваченные при недоступном сервере, '
+            'откладываются с экспоненциальной задержкой.'
+        )
+
+    def test_04_send_outbox_drains_queue(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        outbox_before_count = len(mail.outbox)
+        for number in range(5):
+            OutgoingEmail.objects.create(
+                subject='Тема', body='Текст', from_email=settings.EMAIL,
+                recipient=f'drain{number}@yamdb.fake'
+            )
+        call_command('send_outbox', '--batch-size', '2')
+        assert len(mail.outbox) == outbox_before_count + 5, (
+            'Проверьте, что `send_outbox` без `--loop` отправляет все '
+            'письма из очереди, а не только первую пачку.'
+        )
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
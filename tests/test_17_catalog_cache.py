@@ -0,0 +1,154 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import bump_generation
+from reviews.models import Category, Genre
+
+
+def table_queries(context, *tables):
+    return [
+        query['sql'] for query in context.captured_queries
+        if any(f'"{table}"' in query['sql'] for table in tables)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17CatalogCache:
+    url_titles = '/api/v1/titles/'
+
+    def create_catalog(self):
+        Category.objects.create(name='Фильм', slug='movie')
+        for number in range(5):
+            Genre.objects.create(name=f'Жанр {number}', slug=f'genre-{number}')
+
+    def test_01_title_create_checks_catalog_once(self, admin_client):
+        self.create_catalog()
+        data = {
+            'name': 'Сталкер', 'year': 1979, 'category': 'movie',
+            'genre': [f'genre-{number}' for number in range(5)],
+        }
+        admin_client.get(f'{self.url_titles}?category=movie&genre=genre-0')
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.url_titles, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['genre'] == data['genre']
+        assert response.json()['category'] == 'movie'
+        for table in ('reviews_category', 'reviews_genre'):
+            assert len(table_queries(context, table)) == 1, (
+                f'Проверьте, что `{self.url_titles}` при создании '
+                'произведения сверяет слаги справочника с базой одним '
+                'запросом.'
+            )
+        assert len(table_queries(
+            context, 'reviews_title', 'reviews_title_genre'
+        )) == 2, (
+            'Проверьте, что создание произведения с пятью жанрами '
+            'выполняется двумя SQL-запросами.'
+        )
+
+        response = admin_client.get(self.url_titles)
+        title = response.json()['results'][0]
+        assert title['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert len(title['genre']) == 5
+
+    def test_02_catalog_follows_changes(self, admin_client):
+        self.create_catalog()
+        admin_client.post(self.url_titles, data={
+            'name': 'Солярис', 'year': 1972, 'category': 'movie',
+            'genre': ['genre-0'],
+        })
+        response = admin_client.post('/api/v1/genres/', data={
+            'name': 'Драма', 'slug': 'drama'
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        response = admin_client.post(self.url_titles, data={
+            'name': 'Зеркало', 'year': 1975, 'category': 'movie',
+            'genre': ['drama'],
+        })
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что кэш справочников сбрасывается при '
+            'добавлении жанра.'
+        )
+
+        # Изменение из другого процесса: сигналы здесь не срабатывают,
+        # о нём сообщает только новое поколение в общем кэше.
+        Category.objects.filter(slug='movie').update(
+            name='Кино', slug='cinema'
+        )
+        bump_generation(Category)
+        response = admin_client.get(f'{self.url_titles}?category=cinema')
+        results = response.json()['results']
+        assert len(results) == 2
+        assert results[0]['category'] == {'name': 'Кино', 'slug': 'cinema'}
+
+    def test_03_unknown_slugs(self, admin_client):
+        self.create_catalog()
+        response = admin_client.post(self.url_titles, data={
+            'name': 'Сталкер', 'year': 1979, 'category': 'series',
+            'genre': ['genre-0'],
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'category' in response.json()
+        response = admin_client.post(self.url_titles, data={
+            'name': 'Сталкер', 'year': 1979, 'category': 'movie',
+            'genre': ['genre-0', 'unknown'],
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'genre' in response.json()
+        response = admin_client.get(f'{self.url_titles}?genre=unknown')
+        assert response.json()['count'] == 0
+
+    def test_04_snapshot_expires(self, settings, admin_client):
+        self.create_catalog()
+        admin_client.post(self.url_titles, data={
+            'name': 'Солярис', 'year': 1972, 'category': 'movie',
+            'genre': ['genre-0'],
+        })
+        settings.CATALOG_SNAPSHOT_MAX_AGE = 0
+        # Изменение из процесса с собственным кэшем: поколение здесь
+        # не меняется, снимок обновляется только по сроку.
+        Category.objects.filter(slug='movie').update(
+            name='Кино', slug='cinema'
+        )
+        response = admin_client.get(f'{self.url_titles}?category=cinema')
+        results = response.json()['results']
+        assert len(results) == 1, (
+            'Проверьте, что снимок справочника перечитывается по истечении '
+            'CATALOG_SNAPSHOT_MAX_AGE.'
+        )
+        assert results[0]['category'] == {'name': 'Кино', 'slug': 'cinema'}
+
+    def test_05_write_checks_database(self, admin_client):
+        self.create_catalog()
+        admin_client.get(f'{self.url_titles}?genre=genre-0')
+        # Изменения из другого процесса до обновления снимка: запись
+        # должна опираться на базу, а не на снимок.
+        # Сигналы здесь не срабатывают, поколение не меняется.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM reviews_genre WHERE slug = %s', ['genre-1']
+            )
+        Genre.objects.bulk_create([Genre(name='Драма', slug='drama')])
+        Category.objects.bulk_create([Category(name='Сериал', slug='series')])
+        response = admin_client.post(self.url_titles, data={
+            'name': 'Сталкер', 'year': 1979, 'category': 'movie',
+            'genre': ['genre-0', 'genre-1'],
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что удалённый в другом процессе жанр отклоняется '
+            'при создании произведения.'
+        )
+        assert 'genre' in response.json()
+        response = admin_client.post(self.url_titles, data={
+            'name': 'Сталкер', 'year': 1979, 'category': 'series',
+            'genre': ['genre-0', 'drama'],
+        })
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что созданные в другом процессе жанр и категория '
+            'принимаются при создании произведения.'
+        )
+        assert response.json()['category'] == 'series'
+        assert response.json()['genre'] == ['genre-0', 'drama']
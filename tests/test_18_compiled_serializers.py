@@ -0,0 +1,42 @@
+import pytest
+from django.core.cache import cache
+
+from api.views import CommentViewSet, ReviewViewSet, TitleViewSet
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18CompiledSerializers:
+
+    def fetch(self, client, url):
+        cache.clear()
+        response = client.get(url)
+        assert response.status_code == 200
+        return response.json()
+
+    def test_01_compiled_lists_match_serializers(
+            self, monkeypatch, admin_client, admin, user_client, user
+    ):
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        urls = (
+            '/api/v1/titles/',
+            '/api/v1/titles/?genre=horror&year=1984',
+            '/api/v1/titles/?search=орешек',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/?pagination=cursor&limit=1',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        )
+        compiled = [self.fetch(admin_client, url) for url in urls]
+        for viewset in (TitleViewSet, ReviewViewSet, CommentViewSet):
+            monkeypatch.setattr(viewset, 'compiled_list', False)
+        expected = [self.fetch(admin_client, url) for url in urls]
+        for url, fast, slow in zip(urls, compiled, expected):
+            assert fast == slow, (
+                f'Проверьте, что быстрый сериализатор для `{url}` '
+                'возвращает те же данные, что и сериализатор DRF.'
+            )
+        assert compiled[0]['results'][0]['rating'] is not None
+        assert compiled[1]['count'] == compiled[2]['count'] == 1
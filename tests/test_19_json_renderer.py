@@ -0,0 +1,108 @@
+import json
+from http import HTTPStatus
+from io import BytesIO
+
+import pytest
+from rest_framework.exceptions import ParseError
+
+from api import parsers, renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from tests.utils import create_titles
+
+
+DATA = {'name': 'Сталкер', 'lines': 'a\u2028b\u2029c', 'rating': None,
+        'genre': [{'slug': 'drama'}], 'errors': {1: ['Ошибка']}}
+EXPECTED = (
+    '{"name":"Сталкер","lines":"a\\u2028b\\u2029c","rating":null,'
+    '"genre":[{"slug":"drama"}],"errors":{"1":["Ошибка"]}}'
+).encode()
+
+
+def spy(monkeypatch, module, name, calls):
+    original = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(name)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(module, name, wrapper)
+
+
+def parse(content):
+    return FastJSONParser().parse(BytesIO(content))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19JSONRenderer:
+    url_titles = '/api/v1/titles/'
+
+    def test_01_cyrillic_is_not_escaped(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.get(self.url_titles)
+        assert response.status_code == HTTPStatus.OK
+        assert 'Терминатор'.encode() in response.content, (
+            f'Проверьте, что `{self.url_titles}` возвращает кириллицу без '
+            'экранирования \\u.'
+        )
+
+    def test_02_fallback_matches_fast_renderer(self, monkeypatch):
+        data = {'name': 'Сталкер', 'lines': 'a\u2028b', 'rating': None,
+                'genre': [{'slug': 'drama'}], 'errors': {1: ['Ошибка']}}
+        fast = FastJSONRenderer().render(data)
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert FastJSONRenderer().render(data) == fast
+        assert b'\\u2028' in fast
+
+    def test_03_json_body_is_parsed(self, admin_client):
+        response = admin_client.post(
+            '/api/v1/categories/',
+            data=json.dumps({'name': 'Фильм', 'slug': 'movie'}),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json() == {'name': 'Фильм', 'slug': 'movie'}
+        response = admin_client.post(
+            '/api/v1/categories/', data='{"name": ',
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_large_lists_are_streamed(self, settings, admin_client):
+        create_titles(admin_client)
+        expected = admin_client.get(self.url_titles).json()
+        settings.JSON_STREAM_MIN_ITEMS = 1
+        settings.JSON_STREAM_CHUNK_SIZE = 1
+        response = admin_client.get(self.url_titles)
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            f'Проверьте, что большие списки `{self.url_titles}` отдаются '
+            'потоком.'
+        )
+        assert response['Content-Type'] == 'application/json'
+        assert json.loads(b''.join(response.streaming_content)) == expected
+
+    @pytest.mark.skipif(renderers.orjson is None,
+                        reason='orjson не установлен')
+    def test_05_orjson(self, monkeypatch):
+        calls = []
+        for name in ('dumps', 'loads'):
+            spy(monkeypatch, renderers.orjson, name, calls)
+        assert FastJSONRenderer().render(DATA) == EXPECTED, (
+            'Проверьте, что orjson приводит числовые ключи к строкам и '
+            'экранирует разделители строк U+2028 и U+2029.'
+        )
+        assert parse(EXPECTED) == {**DATA, 'errors': {'1': ['Ошибка']}}
+        assert calls == ['dumps', 'loads']
+        with pytest.raises(ParseError):
+            parse(b'{"name": ')
+
+    def test_06_standard_json_fallback(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+        assert FastJSONRenderer().render(DATA) == EXPECTED, (
+            'Проверьте, что без orjson ответ кодируется стандартным json.'
+        )
+        assert parse(EXPECTED) == {**DATA, 'errors': {'1': ['Ошибка']}}
+        with pytest.raises(ParseError):
+            parse(b'{"name": ')
@@ -0,0 +1,87 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.views import ReviewViewSet, TitleViewSet
+from tests.utils import create_reviews
+
+
+def get(client, url):
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20SparseFields:
+    url_titles = '/api/v1/titles/'
+
+    @pytest.mark.parametrize('compiled_list', (True, False))
+    def test_01_fields_prune_columns(self, monkeypatch, compiled_list,
+                                     admin_client, admin, user_client, user):
+        monkeypatch.setattr(TitleViewSet, 'compiled_list', compiled_list)
+        create_reviews(admin_client, {admin: admin_client, user: user_client})
+        full, _ = get(admin_client, self.url_titles)
+        response, queries = get(
+            admin_client, f'{self.url_titles}?fields=id,name,rating'
+        )
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert set(results[0]) == {'id', 'name', 'rating'}, (
+            f'Проверьте, что `{self.url_titles}?fields=` оставляет в ответе '
+            'только перечисленные поля.'
+        )
+        assert len(response.content) < len(full.content)
+        assert not [sql for sql in queries if 'description' in sql], (
+            'Проверьте, что поля, не попавшие в ответ, не читаются из базы.'
+        )
+        assert not [sql for sql in queries if 'reviews_title_genre' in sql], (
+            'Проверьте, что связи, не попавшие в ответ, не загружаются.'
+        )
+        ratings = {title['id']: title['rating']
+                   for title in full.json()['results']}
+        for title in results:
+            assert title['rating'] == ratings[title['id']]
+
+        response, queries = get(
+            admin_client, f'{self.url_titles}?exclude=description,genre'
+        )
+        assert set(response.json()['results'][0]) == {
+            'id', 'name', 'year', 'rating', 'category'
+        }
+        assert not [sql for sql in queries if 'reviews_title_genre' in sql]
+
+        response, _ = get(
+            admin_client,
+            f'{self.url_titles}{results[0]["id"]}/?fields=name'
+        )
+        assert response.json() == {'name': results[0]['name']}
+
+    def test_02_fields_with_cursor_pagination(self, monkeypatch, admin_client,
+                                              admin, user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            '?pagination=cursor&limit=1&fields=id,text'
+        )
+        for compiled_list in (True, False):
+            monkeypatch.setattr(ReviewViewSet, 'compiled_list', compiled_list)
+            response, _ = get(admin_client, url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert list(data['results'][0]) == ['id', 'text']
+            response, _ = get(admin_client, data['next'])
+            assert response.json()['results'][0]['id'] != (
+                data['results'][0]['id']
+            )
+
+    def test_03_unknown_fields(self, admin_client):
+        response = admin_client.get(f'{self.url_titles}?fields=id,secret')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'fields' in response.json()
@@ -0,0 +1,73 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.views import TitleViewSet
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21BatchTitles:
+    url_titles = '/api/v1/titles/'
+    url_batch = '/api/v1/titles/batch/'
+
+    def test_01_get_by_ids(self, client, admin_client, admin, user_client,
+                           user):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        first, second = (title['id'] for title in titles)
+        expected = {
+            pk: client.get(f'{self.url_titles}{pk}/').json()
+            for pk in (first, second)
+        }
+        url = f'{self.url_titles}?ids={second},999,{first},{second}'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            'results': [expected[second], expected[first]],
+            'missing': [999],
+        }, (
+            f'Проверьте, что `{self.url_titles}?ids=` возвращает '
+            'произведения в порядке запроса и перечисляет ненайденные id.'
+        )
+
+        counts = []
+        for ids in (str(first), f'{first},{second}'):
+            with CaptureQueriesContext(connection) as context:
+                client.get(f'{self.url_titles}?ids={ids}&year=1')
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что количество SQL-запросов не зависит от '
+            'количества запрошенных произведений.'
+        )
+
+    def test_02_post_batch(self, client, admin_client):
+        _, titles = create_reviews(admin_client, {})
+        ids = [title['id'] for title in reversed(titles)]
+        response = client.post(
+            self.url_batch, data=json.dumps({'ids': [*ids, 999]}),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.url_batch}` доступен без авторизации.'
+        )
+        data = response.json()
+        assert [title['id'] for title in data['results']] == ids
+        assert data['missing'] == [999]
+
+    def test_03_invalid_ids(self, monkeypatch, client):
+        response = client.get(f'{self.url_titles}?ids=1,abc')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'ids' in response.json()
+        response = client.post(
+            self.url_batch, data=json.dumps({'ids': []}),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        monkeypatch.setattr(TitleViewSet, 'max_batch_size', 2)
+        response = client.get(f'{self.url_titles}?ids=1,2,3')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
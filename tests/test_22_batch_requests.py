@@ -0,0 +1,86 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22BatchRequests:
+    url_batch = '/api/v1/batch/'
+
+    def batch(self, client, *requests):
+        return client.post(
+            self.url_batch, data=json.dumps({'requests': requests}),
+            content_type='application/json'
+        )
+
+    def test_01_sub_requests(self, client, admin_client, admin, user_client,
+                             user):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        comments_url = (
+            f'{title_url}reviews/{reviews[0]["id"]}/comments/?limit=1'
+        )
+        response = self.batch(
+            user_client,
+            {'method': 'GET', 'path': title_url},
+            {'method': 'GET', 'path': f'{title_url}reviews/'},
+            {'method': 'GET', 'path': comments_url},
+            {'method': 'GET', 'path': '/api/v1/users/me/'},
+            {'method': 'GET', 'path': '/api/v1/unknown/'},
+            {'method': 'POST', 'path': '/api/v1/categories/',
+             'body': {'name': 'Фильм', 'slug': 'movie'}},
+        )
+        assert response.status_code == HTTPStatus.OK
+        responses = response.json()['responses']
+        assert [item['status'] for item in responses] == [
+            200, 200, 200, 200, 404, 403
+        ], (
+            f'Проверьте, что `{self.url_batch}` возвращает статус каждого '
+            'подзапроса и применяет права доступа представлений.'
+        )
+        assert responses[0]['body'] == client.get(title_url).json()
+        assert responses[2]['body'] == user_client.get(comments_url).json()
+        assert responses[3]['body']['username'] == user.username
+
+        responses = self.batch(
+            client, {'method': 'GET', 'path': '/api/v1/users/me/'}
+        ).json()['responses']
+        assert responses[0]['status'] == HTTPStatus.UNAUTHORIZED
+
+        responses = self.batch(
+            admin_client,
+            {'method': 'POST', 'path': '/api/v1/categories/',
+             'body': {'name': 'Фильм', 'slug': 'movie'}},
+            {'method': 'GET', 'path': '/api/v1/categories/?search=movie'},
+        ).json()['responses']
+        assert responses[0]['status'] == HTTPStatus.CREATED
+        assert responses[1]['body']['count'] == 1
+
+    def test_02_limits(self, settings, client):
+        request = {'method': 'GET', 'path': '/api/v1/categories/'}
+        response = self.batch(
+            client, *[request] * (settings.API_BATCH_MAX_REQUESTS + 1)
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{self.url_batch}` ограничивает количество '
+            'подзапросов.'
+        )
+        response = self.batch(client)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = self.batch(
+            client, {'method': 'GET', 'path': 'http://example.com/'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = self.batch(
+            client, {'method': 'POST', 'path': self.url_batch,
+                     'body': {'requests': [request]}}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['responses'][0]['status'] == (
+            HTTPStatus.BAD_REQUEST
+        )
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import TitleRanking
+from tests.utils import create_single_review, create_titles
+
+
+def ranking_rows():
+    return sorted(TitleRanking.objects.values_list(
+        'title_id', 'genre_id', 'category_id', 'year', 'rating',
+        'review_count'
+    ), key=lambda row: (row[0], row[1] or 0))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23TopTitles:
+    url_top = '/api/v1/titles/top/'
+
+    def top_ids(self, client, query=''):
+        response = client.get(f'{self.url_top}{query}')
+        assert response.status_code == HTTPStatus.OK
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_top_titles(self, settings, client, admin_client, user_client,
+                           moderator_client):
+        settings.TOP_TITLES_MIN_REVIEWS = 2
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = (title['id'] for title in titles)
+        create_single_review(admin_client, terminator, 'Хорошо', 6)
+        create_single_review(user_client, terminator, 'Отлично', 8)
+        create_single_review(admin_client, die_hard, 'Шедевр', 10)
+        assert self.top_ids(client) == [terminator], (
+            f'Проверьте, что `{self.url_top}` не включает произведения с '
+            'количеством отзывов меньше порога.'
+        )
+
+        response = create_single_review(user_client, die_hard, 'Да', 9)
+        assert self.top_ids(client) == [die_hard, terminator], (
+            f'Проверьте, что `{self.url_top}` упорядочивает произведения '
+            'по рейтингу и обновляется при добавлении отзывов.'
+        )
+        assert client.get(self.url_top).json()['results'][0] == (
+            client.get(f'/api/v1/titles/{die_hard}/').json()
+        )
+        assert self.top_ids(client, '?genre=horror') == [terminator]
+        assert self.top_ids(client, '?category=books') == [die_hard]
+        assert self.top_ids(client, '?year_min=1985') == [die_hard]
+        assert self.top_ids(client, '?year_max=1985&genre=comedy') == [
+            terminator
+        ]
+        assert self.top_ids(client, '?limit=1') == [die_hard]
+        assert self.top_ids(client, '?genre=unknown') == []
+
+        with CaptureQueriesContext(connection) as context:
+            self.top_ids(client, '?category=films&min_reviews=2')
+        assert len(context.captured_queries) <= 3
+
+        rows = ranking_rows()
+        call_command('rebuild_ratings')
+        assert ranking_rows() == rows, (
+            'Проверьте, что пересчёт рейтинга совпадает с инкрементальным '
+            'обновлением.'
+        )
+
+        review_id = response.json()['id']
+        user_client.delete(f'/api/v1/titles/{die_hard}/reviews/{review_id}/')
+        assert self.top_ids(client) == [terminator]
+
+        admin_client.patch(
+            f'/api/v1/titles/{terminator}/', data={'genre': ['drama']}
+        )
+        assert self.top_ids(client, '?genre=horror') == []
+        assert self.top_ids(client, '?genre=drama') == [terminator]
+
+        admin_client.delete(f'/api/v1/titles/{terminator}/')
+        assert self.top_ids(client) == []
+        assert not TitleRanking.objects.exists()
+
+    def test_02_list_filters_are_ignored(self, settings, client,
+                                         admin_client, user_client):
+        settings.TOP_TITLES_MIN_REVIEWS = 1
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = (title['id'] for title in titles)
+        create_single_review(admin_client, terminator, 'Хорошо', 6)
+        create_single_review(user_client, die_hard, 'Шедевр', 10)
+        for query in ('?search=Сталкер', '?name=Сталкер', '?ordering=name',
+                      '?rating_min=8'):
+            assert self.top_ids(client, query) == [die_hard, terminator], (
+                f'Проверьте, что `{self.url_top}` не применяет фильтры '
+                'и сортировку списка произведений.'
+            )
+
+    def test_03_invalid_params(self, client):
+        response = client.get(f'{self.url_top}?limit=1000')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.get(f'{self.url_top}?year_min=abc')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24WeightedRating:
+    url_titles = '/api/v1/titles/'
+
+    def weighted(self, client, title_id):
+        response = client.get(
+            f'{self.url_titles}{title_id}/?include=weighted_rating'
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json()['weighted_rating']
+
+    def test_01_weighted_rating(self, settings, client, admin_client,
+                                user_client, moderator_client):
+        settings.WEIGHTED_RATING_PRIOR_MEAN = 5.5
+        settings.WEIGHTED_RATING_PRIOR_WEIGHT = 10
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = (title['id'] for title in titles)
+        assert self.weighted(client, terminator) is None
+
+        create_single_review(admin_client, terminator, 'Шедевр', 10)
+        create_single_review(admin_client, die_hard, 'Хорошо', 9)
+        response = create_single_review(user_client, die_hard, 'Да', 9)
+        assert self.weighted(client, terminator) == pytest.approx(65 / 11)
+        assert self.weighted(client, die_hard) == pytest.approx(73 / 12), (
+            'Проверьте, что взвешенный рейтинг учитывает априорную оценку '
+            'и обновляется при добавлении отзывов.'
+        )
+
+        response = client.get(self.url_titles)
+        assert 'weighted_rating' not in response.json()['results'][0], (
+            'Проверьте, что взвешенный рейтинг выводится только по запросу.'
+        )
+        response = client.get(
+            f'{self.url_titles}?ordering=-weighted_rating'
+            '&fields=id,weighted_rating'
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            die_hard, terminator
+        ], (
+            'Проверьте, что список произведений сортируется по '
+            'взвешенному рейтингу.'
+        )
+
+        category = Category.objects.get(slug='films')
+        category.rating_prior_mean = 9
+        category.rating_prior_weight = 1
+        category.save()
+        assert self.weighted(client, terminator) == pytest.approx(9.5), (
+            'Проверьте, что априорная оценка категории применяется к её '
+            'произведениям.'
+        )
+
+        review_id = user_client.get(
+            f'{self.url_titles}{die_hard}/reviews/'
+        ).json()['results'][0]['id']
+        user_client.delete(f'{self.url_titles}{die_hard}/reviews/{review_id}/')
+        assert self.weighted(client, die_hard) == pytest.approx(64 / 11)
+
+        values = dict(Title.objects.values_list('pk', 'weighted_rating'))
+        Title.objects.update(weighted_rating=None)
+        call_command('rebuild_weighted_ratings')
+        assert dict(
+            Title.objects.values_list('pk', 'weighted_rating')
+        ) == pytest.approx(values)
+
+    def test_02_write_responses(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'{self.url_titles}{titles[0]["id"]}/'
+        response = admin_client.patch(
+            url, data={'name': 'Терминатор 2', 'weighted_rating': 10}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert 'weighted_rating' not in response.json(), (
+            'Проверьте, что взвешенный рейтинг не выводится в ответах на '
+            'изменение произведения и не принимается от клиента.'
+        )
+        assert Title.objects.get(pk=titles[0]['id']).weighted_rating is None
+
+    def test_03_unknown_include(self, client):
+        response = client.get(f'{self.url_titles}?include=unknown')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
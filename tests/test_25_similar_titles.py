@@ -0,0 +1,124 @@
+import math
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Review, SimilarTitle, Title
+
+SCORES = {
+    'first': {'Сталкер': 10, 'Солярис': 9, 'Мимино': 2},
+    'second': {'Сталкер': 9, 'Солярис': 10, 'Мимино': 1},
+    'third': {'Сталкер': 2, 'Солярис': 3, 'Мимино': 10},
+    'fourth': {'Сталкер': 8, 'Солярис': 8},
+}
+
+
+def adjusted_cosine(scores, title, other):
+    means = {
+        user: sum(rated.values()) / len(rated)
+        for user, rated in scores.items()
+    }
+
+    def vector(name):
+        return {
+            user: rated[name] - means[user]
+            for user, rated in scores.items() if name in rated
+        }
+
+    first, second = vector(title), vector(other)
+    dot = sum(value * second[user] for user, value in first.items()
+              if user in second)
+    norm = math.sqrt(sum(value ** 2 for value in first.values()))
+    other_norm = math.sqrt(sum(value ** 2 for value in second.values()))
+    return dot / (norm * other_norm)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25SimilarTitles:
+    url_titles = '/api/v1/titles/'
+
+    def create_reviews(self, django_user_model):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        titles = {
+            name: Title.objects.create(name=name, year=1979,
+                                       category=category)
+            for name in ('Сталкер', 'Солярис', 'Мимино', 'Кин-дза-дза')
+        }
+        users = {}
+        for username, rated in SCORES.items():
+            users[username] = django_user_model.objects.create(
+                username=username, email=f'{username}@yamdb.fake'
+            )
+            for name, score in rated.items():
+                Review.objects.create(
+                    title=titles[name], author=users[username],
+                    text='Отзыв', score=score
+                )
+        return titles, users
+
+    def similar(self, client, title, query=''):
+        response = client.get(f'{self.url_titles}{title.pk}/similar/{query}')
+        assert response.status_code == HTTPStatus.OK
+        return [item['name'] for item in response.json()['results']]
+
+    def test_01_similar_titles(self, client, django_user_model):
+        titles, users = self.create_reviews(django_user_model)
+        stalker = titles['Сталкер']
+        assert self.similar(client, stalker) == []
+
+        call_command('rebuild_similar_titles')
+        assert self.similar(client, stalker) == ['Солярис'], (
+            f'Проверьте, что `{self.url_titles}{{id}}/similar/` возвращает '
+            'произведения, которые высоко оценили те же пользователи.'
+        )
+        row = SimilarTitle.objects.get(
+            title=stalker, similar=titles['Солярис']
+        )
+        assert row.score == pytest.approx(
+            adjusted_cosine(SCORES, 'Сталкер', 'Солярис')
+        )
+        assert row.common == 4
+        assert not Title.objects.filter(similar_stale=True).exists()
+
+        Review.objects.create(
+            title=titles['Кин-дза-дза'], author=users['third'],
+            text='Отзыв', score=9
+        )
+        Review.objects.create(
+            title=titles['Кин-дза-дза'], author=users['second'],
+            text='Отзыв', score=1
+        )
+        assert set(Title.objects.filter(
+            similar_stale=True
+        ).values_list('name', flat=True)) == {'Кин-дза-дза'}
+        call_command('rebuild_similar_titles', '--stale')
+        assert self.similar(client, titles['Кин-дза-дза']) == ['Мимино'], (
+            'Проверьте, что пересчёт изменившихся произведений обновляет '
+            'их соседей.'
+        )
+        assert not Title.objects.filter(similar_stale=True).exists()
+
+    def test_02_similar_titles_errors(self, client, django_user_model):
+        titles, _ = self.create_reviews(django_user_model)
+        response = client.get(f'{self.url_titles}100500/similar/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.get(
+            f'{self.url_titles}{titles["Сталкер"].pk}/similar/?limit=1000'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_write_responses(self, admin_client, django_user_model):
+        titles, _ = self.create_reviews(django_user_model)
+        title = titles['Сталкер']
+        response = admin_client.patch(
+            f'{self.url_titles}{title.pk}/',
+            data={'description': 'Зона', 'similar_stale': False}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert 'similar_stale' not in response.json(), (
+            'Проверьте, что служебный флаг пересчёта похожих произведений '
+            'не выводится в ответах и не принимается от клиента.'
+        )
+        title.refresh_from_db()
+        assert title.similar_stale
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews import trending
+from reviews.models import TitleTrend
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.fixture
+def trending_settings(settings):
+    settings.TRENDING_FLUSH_INTERVAL = 0
+    settings.TRENDING_HALF_LIFE = 3600
+    trending.take_pending()
+    return settings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26TrendingTitles:
+    url_trending = '/api/v1/titles/trending/'
+
+    def trending_ids(self, client, query=''):
+        response = client.get(f'{self.url_trending}{query}')
+        assert response.status_code == HTTPStatus.OK
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_decayed_counters(self, trending_settings):
+        now = 1700000000
+        score = trending.event_score(4, now - 3600)
+        score = trending.log_add(score, trending.event_score(1, now))
+        assert trending.decayed_value(score, now) == pytest.approx(3), (
+            'Проверьте, что вклад события уменьшается вдвое за период '
+            'полураспада.'
+        )
+        first = trending.event_score(1, now)
+        second = trending.event_score(2, now - 7200)
+        assert trending.log_add(first, second) == pytest.approx(
+            trending.log_add(second, first)
+        )
+
+    def test_02_trending_titles(self, trending_settings, client,
+                                admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = (title['id'] for title in titles)
+        assert self.trending_ids(client) == []
+
+        for _ in range(3):
+            client.get(f'/api/v1/titles/{die_hard}/')
+        assert self.trending_ids(client) == [die_hard], (
+            'Проверьте, что просмотры произведения учитываются в '
+            f'`{self.url_trending}`.'
+        )
+        create_single_review(admin_client, terminator, 'Хорошо', 8)
+        assert self.trending_ids(client) == [terminator, die_hard], (
+            'Проверьте, что отзывы весят больше просмотров.'
+        )
+        assert self.trending_ids(client, '?category=books') == [die_hard]
+        assert self.trending_ids(client, '?category=unknown') == []
+        assert self.trending_ids(client, '?limit=1') == [terminator]
+
+        trend = TitleTrend.objects.get(title_id=die_hard)
+        assert trending.decayed_value(trend.score) == pytest.approx(
+            3 * trending_settings.TRENDING_WEIGHTS['view'], rel=1e-3
+        )
+
+    def test_03_unknown_titles(self, trending_settings, client,
+                               admin_client, monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        die_hard = titles[1]['id']
+        trending_settings.TRENDING_FLUSH_INTERVAL = 3600
+        response = client.get('/api/v1/titles/100500/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert trending.take_pending() == {}, (
+            'Проверьте, что просмотры несуществующих произведений не '
+            'учитываются.'
+        )
+
+        trending.record_event('view', 2 ** 64)
+        trending.record_event('view', die_hard)
+        assert trending.flush() == 1
+        assert list(TitleTrend.objects.values_list('title_id', flat=True)) == [
+            die_hard
+        ]
+
+        def fail(pending):
+            raise ValueError('Ошибка сохранения')
+
+        monkeypatch.setattr(trending, 'merge_scores', fail)
+        trending.record_event('view', die_hard)
+        assert trending.flush() == 0
+        monkeypatch.undo()
+        assert trending.take_pending().keys() == {die_hard}, (
+            'Проверьте, что при ошибке сохранения счётчики возвращаются '
+            'в очередь процесса.'
+        )
+
+    def test_04_invalid_params(self, client):
+        response = client.get(f'{self.url_trending}?limit=0')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
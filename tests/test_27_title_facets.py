@@ -0,0 +1,195 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+
+from api import facets as facets_module
+from api.facets import (
+    facet_counts, get_index, query_facets, wait_for_index
+)
+from api.filters import TitleFilter
+from reviews.models import Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27TitleFacets:
+    url_titles = '/api/v1/titles/'
+
+    def create_catalog(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post(self.url_titles, data={
+            'name': 'Сталкер', 'year': 1979, 'category': 'films',
+            'genre': ['drama', 'horror'],
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        return [title['id'] for title in titles] + [response.json()['id']]
+
+    def names(self, client, query):
+        response = client.get(f'{self.url_titles}?{query}')
+        assert response.status_code == HTTPStatus.OK
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_filters(self, admin_client, user_client):
+        terminator, die_hard, stalker = self.create_catalog(admin_client)
+        assert self.names(admin_client, 'genre=comedy,drama') == [
+            'Крепкий орешек', 'Сталкер', 'Терминатор'
+        ], 'Проверьте, что несколько жанров по умолчанию объединяются.'
+        assert self.names(
+            admin_client, 'genre=drama,horror&genre_mode=and'
+        ) == ['Сталкер'], (
+            'Проверьте, что genre_mode=and требует все указанные жанры.'
+        )
+        assert self.names(
+            admin_client, 'genre=drama,unknown&genre_mode=and'
+        ) == []
+        assert self.names(admin_client, 'year_min=1980&year_max=1985') == [
+            'Терминатор'
+        ]
+        create_single_review(admin_client, terminator, 'Хорошо', 8)
+        create_single_review(user_client, terminator, 'Неплохо', 5)
+        create_single_review(admin_client, die_hard, 'Средне', 4)
+        assert self.names(admin_client, 'rating_min=6') == ['Терминатор']
+        assert self.names(admin_client, 'rating_max=6.5') == [
+            'Крепкий орешек', 'Терминатор'
+        ]
+
+    def test_02_facet_counts(self, admin_client):
+        self.create_catalog(admin_client)
+        response = admin_client.get(f'{self.url_titles}?facets=true')
+        assert response.status_code == HTTPStatus.OK
+        wait_for_index()
+        facets = response.json()['facets']
+        assert facets['category'] == [
+            {'name': 'Фильм', 'slug': 'films', 'count': 2},
+            {'name': 'Книги', 'slug': 'books', 'count': 1},
+        ], (
+            'Проверьте, что `facets` содержит количество произведений '
+            'по категориям.'
+        )
+        assert {
+            item['slug']: item['count'] for item in facets['genre']
+        } == {'horror': 2, 'drama': 2, 'comedy': 1}
+        assert facets['decade'] == [
+            {'decade': 1970, 'count': 1}, {'decade': 1980, 'count': 2}
+        ]
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(
+                f'{self.url_titles}?facets=1&genre=drama&category=films'
+            )
+        facets = response.json()['facets']
+        assert facets['category'] == [
+            {'name': 'Фильм', 'slug': 'films', 'count': 1}
+        ]
+        assert {
+            item['slug']: item['count'] for item in facets['genre']
+        } == {'horror': 1, 'drama': 1}, (
+            'Проверьте, что фасеты считаются для текущего набора фильтров.'
+        )
+        assert facets['decade'] == [{'decade': 1970, 'count': 1}]
+        assert len(context.captured_queries) <= 7
+
+        response = admin_client.get(self.url_titles)
+        assert 'facets' not in response.json()
+
+    def test_03_index_matches_queries(self, admin_client):
+        self.create_catalog(admin_client)
+        get_index()
+        assert wait_for_index() is not None
+        for query in ('', 'genre=horror,comedy', 'year_min=1980',
+                      'genre=drama,horror&genre_mode=and&year=1979',
+                      'category=books&genre=unknown'):
+            params = QueryDict(query)
+            titles = TitleFilter(params, queryset=Title.objects.all()).qs
+            assert facet_counts(titles, params) == (
+                query_facets(titles), True
+            ), (
+                'Проверьте, что фасеты из битового индекса совпадают с '
+                f'подсчётом запросами для `{query}`.'
+            )
+        admin_client.post(self.url_titles, data={
+            'name': 'Брат', 'year': 1997, 'category': 'books',
+            'genre': ['drama'],
+        })
+        admin_client.get(f'{self.url_titles}?facets=true')
+        wait_for_index()
+        response = admin_client.get(f'{self.url_titles}?facets=true')
+        assert {'decade': 1990, 'count': 1} in response.json()['facets'][
+            'decade'
+        ], 'Проверьте, что индекс фасетов обновляется при изменениях.'
+
+    def test_04_search_facets(self, admin_client):
+        self.create_catalog(admin_client)
+        response = admin_client.get(
+            f'{self.url_titles}?search=Сталкер&facets=true'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что фасеты считаются вместе с полнотекстовым '
+            'поиском.'
+        )
+        data = response.json()
+        assert [title['name'] for title in data['results']] == ['Сталкер']
+        assert data['facets']['category'] == [
+            {'name': 'Фильм', 'slug': 'films', 'count': 1}
+        ]
+        assert {
+            item['slug']: item['count'] for item in data['facets']['genre']
+        } == {'horror': 1, 'drama': 1}
+
+    def test_05_index_expires(self, settings, admin_client):
+        self.create_catalog(admin_client)
+        admin_client.get(f'{self.url_titles}?facets=true')
+        wait_for_index()
+        settings.FACET_INDEX_MAX_AGE = 0
+        # Правка из процесса с собственным кэшем поколений.
+        Title.objects.filter(name='Сталкер').update(year=1999)
+        get_index()
+        wait_for_index()
+        response = admin_client.get(
+            f'{self.url_titles}?facets=true&year_min=1990'
+        )
+        assert response.json()['facets']['decade'] == [
+            {'decade': 1990, 'count': 1}
+        ], (
+            'Проверьте, что индекс фасетов перестраивается по истечении '
+            'FACET_INDEX_MAX_AGE.'
+        )
+
+    def test_06_rebuild_off_request_path(self, admin_client, monkeypatch):
+        self.create_catalog(admin_client)
+        get_index()
+        old_index = wait_for_index()
+        build_index = facets_module.build_index
+        release = threading.Event()
+
+        def slow_build(generation):
+            release.wait(5)
+            return build_index(generation)
+
+        monkeypatch.setattr(facets_module, 'build_index', slow_build)
+        admin_client.post(self.url_titles, data={
+            'name': 'Брат', 'year': 1997, 'category': 'books',
+            'genre': ['drama'],
+        })
+        try:
+            assert get_index() is old_index, (
+                'Проверьте, что до окончания перестройки индекса фасетов '
+                'запросы получают прежний индекс.'
+            )
+            response = admin_client.get(f'{self.url_titles}?facets=true')
+            assert response.status_code == HTTPStatus.OK
+            assert {'decade': 1990, 'count': 1} not in response.json()[
+                'facets'
+            ]['decade']
+        finally:
+            release.set()
+        new_index = wait_for_index()
+        assert new_index is not old_index
+        response = admin_client.get(f'{self.url_titles}?facets=true')
+        assert {'decade': 1990, 'count': 1} in response.json()['facets'][
+            'decade'
+        ], 'Проверьте, что перестроенный индекс заменяет прежний.'
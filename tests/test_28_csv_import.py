@@ -0,0 +1,82 @@
+import csv
+import shutil
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, Sum
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+DATA_DIR = (
+    Path(__file__).resolve().parent.parent / 'api_yamdb' / 'static' / 'data'
+)
+
+
+def csv_rows(path, filename):
+    with open(path / filename, encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+def write_rows(path, filename, rows):
+    with open(path / filename, 'w', encoding='utf-8',
+              newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28CsvImport:
+
+    def test_01_import_static_data(self):
+        call_command('convert_csv_to_bd_sqlite', stdout=StringIO())
+
+        expected = {
+            Category: 'category.csv',
+            Genre: 'genre.csv',
+            Title: 'titles.csv',
+            User: 'users.csv',
+            Title.genre.through: 'genre_title.csv',
+            Review: 'review.csv',
+            Comment: 'comments.csv',
+        }
+        for model, filename in expected.items():
+            assert model.objects.count() == len(
+                csv_rows(DATA_DIR, filename)
+            ), f'Проверьте, что из `{filename}` загружены все строки.'
+
+        for title in Title.objects.annotate(
+            reviews_sum=Sum('reviews__score'),
+            reviews_count=Count('reviews')
+        ):
+            assert title.score_sum == (title.reviews_sum or 0)
+            assert title.review_count == title.reviews_count, (
+                'Проверьте, что после загрузки пересчитаны суммы оценок '
+                'и количество отзывов произведений.'
+            )
+
+    def test_02_conflicting_rows(self, tmp_path):
+        for path in DATA_DIR.glob('*.csv'):
+            shutil.copy(path, tmp_path)
+        reviews = csv_rows(tmp_path, 'review.csv')
+        write_rows(tmp_path, 'review.csv', reviews + [
+            dict(reviews[0], id='1000', text='Повтор')
+        ])
+        comments = csv_rows(tmp_path, 'comments.csv')
+        write_rows(tmp_path, 'comments.csv', comments + [
+            dict(comments[0], id='1000', review_id='1000',
+                 text='Ответ на повтор')
+        ])
+
+        out = StringIO()
+        call_command('convert_csv_to_bd_sqlite', '--path', str(tmp_path),
+                     stdout=out)
+        assert not Review.objects.filter(pk=1000).exists()
+        assert not Comment.objects.filter(pk=1000).exists(), (
+            'Проверьте, что строки, ссылающиеся на отброшенные из-за '
+            'конфликта записи, пропускаются.'
+        )
+        assert Review.objects.count() == len(reviews)
+        assert 'конфликтующих' in out.getvalue()
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+from django.db import OperationalError, connection
+
+from api_yamdb.sqlite import base
+
+
+def make_wrapper(path, **options):
+    wrapper = base.DatabaseWrapper({
+        **connection.settings_dict, 'NAME': str(path),
+        'OPTIONS': {'pragmas': {'busy_timeout': 0}, **options},
+    })
+    wrapper.ensure_connection()
+    return wrapper
+
+
+def hold_write_lock(path):
+    holder = sqlite3.connect(str(path), isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    return holder
+
+
+@pytest.mark.django_db
+class Test29SqliteEngine:
+
+    def test_01_pragmas(self, tmp_path):
+        wrapper = make_wrapper(tmp_path / 'db.sqlite3')
+        try:
+            with wrapper.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                assert cursor.fetchone()[0] == 'wal'
+                cursor.execute('PRAGMA synchronous')
+                assert cursor.fetchone()[0] == 1, (
+                    'Проверьте, что PRAGMA применяются к каждому новому '
+                    'соединению.'
+                )
+                cursor.execute('PRAGMA temp_store')
+                assert cursor.fetchone()[0] == 2
+        finally:
+            wrapper.close()
+
+    def test_02_retry_until_lock_released(self, tmp_path, monkeypatch):
+        path = tmp_path / 'db.sqlite3'
+        wrapper = make_wrapper(path, write_retries=3, retry_backoff=0.01)
+        holder = hold_write_lock(path)
+        delays = []
+
+        def release(delay):
+            delays.append(delay)
+            holder.execute('ROLLBACK')
+
+        monkeypatch.setattr(base.time, 'sleep', release)
+        try:
+            wrapper._start_transaction_under_autocommit()
+            assert wrapper.connection.in_transaction, (
+                'Проверьте, что BEGIN IMMEDIATE повторяется, пока база '
+                'занята другим писателем.'
+            )
+            assert len(delays) == 1
+            wrapper.connection.execute('ROLLBACK')
+        finally:
+            holder.close()
+            wrapper.close()
+
+    def test_03_error_after_retries(self, tmp_path, monkeypatch):
+        path = tmp_path / 'db.sqlite3'
+        wrapper = make_wrapper(path, write_retries=3, retry_backoff=0.01)
+        holder = hold_write_lock(path)
+        delays = []
+        monkeypatch.setattr(base.time, 'sleep', delays.append)
+        try:
+            with pytest.raises(OperationalError, match='locked'):
+                wrapper._start_transaction_under_autocommit()
+            assert len(delays) == 3, (
+                'Проверьте, что число повторов BEGIN IMMEDIATE ограничено.'
+            )
+            for attempt, delay in enumerate(delays):
+                assert 0.01 * 2 ** attempt <= delay <= 0.02 * 2 ** attempt
+        finally:
+            holder.close()
+            wrapper.close()
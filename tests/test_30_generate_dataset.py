@@ -0,0 +1,93 @@
+import csv
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Count, Sum
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+OPTIONS = {
+    'users': 20, 'categories': 3, 'genres': 5, 'titles': 15,
+    'reviews': 120, 'comments': 40,
+}
+
+
+def generate(*args, **options):
+    call_command(
+        'generate_dataset', *args, **{**OPTIONS, **options},
+        stdout=StringIO()
+    )
+
+
+def read_rows(path, filename):
+    with open(path / filename, encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30GenerateDataset:
+
+    def test_01_output_is_deterministic(self, tmp_path):
+        first, second, other = (
+            tmp_path / 'first', tmp_path / 'second', tmp_path / 'other'
+        )
+        generate(output=str(first), seed=7)
+        generate(output=str(second), seed=7)
+        generate(output=str(other), seed=8)
+        files = sorted(path.name for path in first.iterdir())
+        assert files == sorted(path.name for path in second.iterdir())
+        for filename in files:
+            assert (first / filename).read_bytes() == (
+                second / filename
+            ).read_bytes(), (
+                'Проверьте, что при одинаковом --seed генерируются '
+                f'одинаковые данные: `{filename}`.'
+            )
+        assert (first / 'review.csv').read_bytes() != (
+            other / 'review.csv'
+        ).read_bytes()
+
+        reviews = read_rows(first, 'review.csv')
+        assert len(reviews) == OPTIONS['reviews']
+        pairs = {(row['author'], row['title_id']) for row in reviews}
+        assert len(pairs) == len(reviews), (
+            'Проверьте, что пользователь оставляет не больше одного отзыва '
+            'на произведение.'
+        )
+        assert len(read_rows(first, 'comments.csv')) == OPTIONS['comments']
+        assert not Title.objects.exists(), (
+            'Проверьте, что с --output данные не записываются в базу.'
+        )
+
+    def test_02_database_mode(self):
+        generate()
+        expected = {
+            User: OPTIONS['users'],
+            Category: OPTIONS['categories'],
+            Genre: OPTIONS['genres'],
+            Title: OPTIONS['titles'],
+            Review: OPTIONS['reviews'],
+            Comment: OPTIONS['comments'],
+        }
+        for model, count in expected.items():
+            assert model.objects.count() == count, (
+                f'Проверьте количество записей `{model.__name__}` '
+                'после генерации.'
+            )
+        for title in Title.objects.annotate(
+            reviews_sum=Sum('reviews__score'),
+            reviews_count=Count('reviews')
+        ):
+            assert title.score_sum == (title.reviews_sum or 0)
+            assert title.review_count == title.reviews_count, (
+                'Проверьте, что после генерации пересчитаны суммы оценок '
+                'и количество отзывов произведений.'
+            )
+
+        with pytest.raises(CommandError):
+            generate()
+
+    def test_03_too_many_reviews(self, tmp_path):
+        with pytest.raises(CommandError):
+            generate(output=str(tmp_path), users=2, titles=2, reviews=5)
@@ -0,0 +1,45 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def write_results(path, **scenarios):
+    path.write_text(json.dumps({'results': {
+        name: {'p95_ms': p95, 'queries_per_request': queries}
+        for name, (p95, queries) in scenarios.items()
+    }}), encoding='utf-8')
+    return str(path)
+
+
+def compare(base, new, *args):
+    out = StringIO()
+    call_command('benchmark', '--compare', base, new, *args, stdout=out)
+    return out.getvalue()
+
+
+class Test31BenchmarkCompare:
+
+    def test_01_within_threshold(self, tmp_path):
+        base = write_results(
+            tmp_path / 'base.json', titles=(10.0, 4), reviews=(5.0, None)
+        )
+        new = write_results(
+            tmp_path / 'new.json', titles=(10.9, 4), reviews=(3.0, 2),
+            comments=(100.0, 50)
+        )
+        assert 'Регрессий не обнаружено' in compare(base, new), (
+            'Проверьте, что рост в пределах --threshold и улучшения не '
+            'считаются регрессией.'
+        )
+
+    @pytest.mark.parametrize('new_values', [(11.5, 4), (10.0, 5)])
+    def test_02_regression(self, tmp_path, new_values):
+        base = write_results(tmp_path / 'base.json', titles=(10.0, 4))
+        new = write_results(tmp_path / 'new.json', titles=new_values)
+        with pytest.raises(CommandError):
+            compare(base, new)
+        assert 'Регрессий не обнаружено' in compare(
+            base, new, '--threshold', '0.3'
+        ), 'Проверьте, что порог регрессии задаётся через --threshold.'